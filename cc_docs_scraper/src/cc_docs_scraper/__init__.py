@@ -1,3 +1,7 @@
 """Claude Code Documentation Scraper."""
 
+from .mirror import Mirror, MirrorError, PageResult, ThresholdError
+
 __version__ = "0.1.0"
+
+__all__ = ["Mirror", "MirrorError", "PageResult", "ThresholdError"]
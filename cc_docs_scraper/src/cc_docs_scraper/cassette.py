@@ -0,0 +1,208 @@
+"""Record/replay HTTP transport for offline, deterministic runs.
+
+A cassette captures every exchange that goes through the shared
+session (see :func:`cc_docs_scraper.http.set_session`): method, URL,
+request headers, status, response headers, decoded body, wire size,
+and timing.  It is stored as gzip-compressed JSON lines.  Replaying a
+cassette serves the recorded responses in order, either at full speed
+or with the original per-request latency.
+"""
+
+import base64
+import gzip
+import json
+import logging
+import time
+from collections import deque
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .http import wire_bytes
+
+log = logging.getLogger("cc_docs_scraper")
+
+
+class Cassette:
+    """An ordered list of recorded HTTP exchanges."""
+
+    def __init__(self, exchanges: list[dict] | None = None) -> None:
+        self.exchanges: list[dict] = list(exchanges or [])
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        """Read a cassette written by :meth:`save`."""
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            return cls([json.loads(line) for line in fh if line.strip()])
+
+    def save(self, path: Path) -> None:
+        """Write the cassette to *path* (gzip-compressed JSON lines)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            for exchange in self.exchanges:
+                fh.write(json.dumps(exchange, sort_keys=True) + "\n")
+        log.info("Recorded %d exchange(s) to %s", len(self.exchanges), path)
+
+
+def _encode_body(body: bytes) -> dict:
+    try:
+        return {"body": body.decode("utf-8"), "body_encoding": "utf-8"}
+    except UnicodeDecodeError:
+        return {
+            "body": base64.b64encode(body).decode("ascii"),
+            "body_encoding": "base64",
+        }
+
+
+def _decode_body(exchange: dict) -> bytes:
+    if exchange.get("body_encoding") == "base64":
+        return base64.b64decode(exchange["body"])
+    return exchange.get("body", "").encode("utf-8")
+
+
+class _ReplayedRaw:
+    """Stand-in for the urllib3 response of a replayed exchange.
+
+    Only reports how many bytes the original body took on the wire.
+    """
+
+    def __init__(self, wire_bytes: int) -> None:
+        self._wire_bytes = wire_bytes
+
+    def tell(self) -> int:
+        return self._wire_bytes
+
+    def close(self) -> None:
+        pass
+
+
+class RecordingAdapter(BaseAdapter):
+    """Transport adapter that records every exchange it forwards.
+
+    Wraps *inner* (a plain :class:`HTTPAdapter` by default).  Failed
+    exchanges are recorded with the exception type so replay raises
+    the same error.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        inner: BaseAdapter | None = None,
+    ) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.inner = inner or HTTPAdapter()
+        self._origin = time.monotonic()
+
+    def send(self, request, **kwargs):
+        started = time.monotonic()
+        exchange = {
+            "method": request.method,
+            "url": request.url,
+            "request_headers": dict(request.headers),
+            "offset": round(started - self._origin, 6),
+        }
+        try:
+            resp = self.inner.send(request, **kwargs)
+            size = wire_bytes(resp)  # before anything reads the body
+            body = resp.content
+        except requests.RequestException as exc:
+            exchange.update(
+                error=type(exc).__name__,
+                message=str(exc),
+                elapsed=round(time.monotonic() - started, 6),
+            )
+            self.cassette.exchanges.append(exchange)
+            raise
+
+        exchange.update(
+            status=resp.status_code,
+            reason=resp.reason,
+            headers=dict(resp.headers),
+            elapsed=round(time.monotonic() - started, 6),
+            wire_bytes=size,
+            **_encode_body(body),
+        )
+        self.cassette.exchanges.append(exchange)
+        return resp
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that serves responses from a cassette.
+
+    Exchanges are matched on method and URL and consumed in recorded
+    order.  With *timing*, each response is delayed by its recorded
+    latency.  A request with no recording left raises
+    ``requests.ConnectionError``.
+    """
+
+    def __init__(self, cassette: Cassette, *, timing: bool = False) -> None:
+        super().__init__()
+        self.timing = timing
+        self._queues: dict[tuple[str, str], deque[dict]] = {}
+        for exchange in cassette.exchanges:
+            key = (exchange["method"], exchange["url"])
+            self._queues.setdefault(key, deque()).append(exchange)
+
+    def send(self, request, **kwargs):
+        queue = self._queues.get((request.method, request.url))
+        if not queue:
+            raise requests.ConnectionError(
+                f"No recorded response for {request.method} {request.url}",
+                request=request,
+            )
+        exchange = queue.popleft()
+
+        if self.timing:
+            time.sleep(exchange.get("elapsed", 0))
+
+        if "error" in exchange:
+            exc_type = getattr(
+                requests.exceptions, exchange["error"],
+                requests.ConnectionError,
+            )
+            raise exc_type(exchange.get("message", ""), request=request)
+
+        resp = requests.Response()
+        resp.status_code = exchange["status"]
+        resp.reason = exchange.get("reason")
+        resp.headers = CaseInsensitiveDict(exchange.get("headers", {}))
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = _decode_body(exchange)
+        resp._content_consumed = True  # iter_content() serves _content
+        resp.raw = _ReplayedRaw(
+            exchange.get("wire_bytes", len(resp._content)),
+        )
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self) -> None:
+        pass
+
+
+def _session_with(adapter: BaseAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def recording_session(cassette: Cassette) -> requests.Session:
+    """Return a session that records all traffic into *cassette*."""
+    return _session_with(RecordingAdapter(cassette))
+
+
+def replay_session(
+    cassette: Cassette,
+    *,
+    timing: bool = False,
+) -> requests.Session:
+    """Return a session that replays *cassette* without network access."""
+    return _session_with(ReplayAdapter(cassette, timing=timing))
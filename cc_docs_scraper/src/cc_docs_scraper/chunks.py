@@ -0,0 +1,123 @@
+"""Section-level chunk index for incremental downstream processing.
+
+Each page is split into heading-delimited chunks whose IDs are stable
+across runs (``<page>#<heading-slug>``), and each chunk is hashed.  The
+index (``chunks.json`` next to the manifest) maps every page to its
+chunk hashes, so each run can report exactly which chunks were added,
+changed, or removed.
+"""
+
+import json
+import logging
+import re
+from pathlib import Path
+
+from .constants import CHUNK_INDEX_FILE
+from .content import compute_hash, split_sections
+from .manifest import manifest_lock
+from .normalize import DEFAULT_NORMALIZERS, normalize
+from .shards import manifest_owns
+from .writer import atomic_write_text
+
+log = logging.getLogger("cc_docs_scraper")
+
+ChunkDelta = dict[str, list[str]]
+
+
+def slugify(heading: str) -> str:
+    """Return a GitHub-style anchor slug for *heading*."""
+    slug = re.sub(r"[^\w\- ]", "", heading.strip().lower())
+    return slug.replace(" ", "-") or "top"
+
+
+def page_chunks(page: str, content: str) -> dict[str, str]:
+    """Split *content* into chunks and return ``{chunk_id: sha256}``.
+
+    *page* is the page's path relative to the output directory.
+    Repeated headings get ``-1``, ``-2`` … suffixes, as on GitHub,
+    skipping any suffixed ID another heading already produced.
+    """
+    chunks: dict[str, str] = {}
+    # emitted slug -> last suffix used for headings with that slug
+    used: dict[str, int] = {}
+    for heading, text in split_sections(content):
+        slug = base = slugify(heading)
+        if base in used:
+            count = used[base]
+            while slug in used:
+                count += 1
+                slug = f"{base}-{count}"
+            used[base] = count
+        used[slug] = 0
+        chunks[f"{page}#{slug}"] = compute_hash(text)
+    return chunks
+
+
+def diff_chunks(old: dict[str, str], new: dict[str, str]) -> ChunkDelta:
+    """Return the chunk IDs added, changed, and removed from *old* to *new*."""
+    return {
+        "added": [cid for cid in new if cid not in old],
+        "changed": [
+            cid for cid in new if cid in old and old[cid] != new[cid]
+        ],
+        "removed": [cid for cid in old if cid not in new],
+    }
+
+
+def load_chunk_index(index_file: Path = CHUNK_INDEX_FILE) -> dict:
+    """Load the chunk index, or return an empty one."""
+    if index_file.exists():
+        return json.loads(index_file.read_text("utf-8"))
+    return {}
+
+
+def update_chunk_index(
+    pages: dict[str, tuple[str, dict[str, str]]],
+    manifest: dict,
+    *,
+    output_dir: Path,
+    index_file: Path = CHUNK_INDEX_FILE,
+    normalizers: tuple[str, ...] = DEFAULT_NORMALIZERS,
+) -> ChunkDelta:
+    """Apply this run's chunked pages to the index and return the delta.
+
+    *pages* maps manifest keys to ``(url, chunks)`` for every page
+    written in this run.  Index entries for pages that left *manifest*
+    are dropped, and manifest pages missing from the index (e.g. on the
+    first run) are chunked from disk after applying *normalizers*.
+    Only pages owned by *manifest* are considered, so shards can update
+    the shared index one after another under its lock.
+    """
+    delta: ChunkDelta = {"added": [], "changed": [], "removed": []}
+    files = manifest.get("files", {})
+
+    with manifest_lock(index_file):
+        index = load_chunk_index(index_file)
+
+        for key in list(index):
+            if key not in files and manifest_owns(manifest, index[key]["url"]):
+                delta["removed"].extend(index.pop(key)["chunks"])
+
+        updates = dict(pages)
+        for key, meta in files.items():
+            path = Path(key)
+            if key not in index and key not in updates and path.is_file():
+                page = path.relative_to(output_dir).as_posix()
+                content = normalize(path.read_text("utf-8"), normalizers)
+                updates[key] = (meta["url"], page_chunks(page, content))
+
+        for key, (url, chunks) in updates.items():
+            old = index.get(key, {}).get("chunks", {})
+            for kind, ids in diff_chunks(old, chunks).items():
+                delta[kind].extend(ids)
+            index[key] = {"url": url, "chunks": chunks}
+
+        atomic_write_text(
+            index_file, json.dumps(index, indent=2, sort_keys=True) + "\n",
+        )
+
+    log.info(
+        "Chunks — added: %d, changed: %d, removed: %d",
+        len(delta["added"]), len(delta["changed"]), len(delta["removed"]),
+    )
+    return delta
@@ -3,15 +3,63 @@
 import argparse
 import logging
 import sys
+from pathlib import Path
 
-from .http import fetch_doc_index
+from .cassette import Cassette, recording_session, replay_session
+from .constants import CHUNK_INDEX_FILE, MANIFEST_FILE, REPORT_DIR
+from .fsck import check_mirror, repair_mirror
+from .http import fetch_markdown, make_probe_fetch, set_hedging, set_session
+from .http2 import Http2Fetcher
+from .latency import HedgeBudget
 from .manifest import load_manifest
-from .orchestrator import check_thresholds, remove_stale_files, run_fetch
+from .normalize import DEFAULT_NORMALIZERS, NORMALIZERS, parse_normalizers
+from .orchestrator import (
+    FetchFn,
+    MirrorError,
+    ThresholdError,
+    check_thresholds,
+    discover_urls,
+    run_fetch,
+)
+from .shards import (
+    fragment_path,
+    merge_fragments,
+    parse_shard,
+    shard_manifest,
+)
+from .sitemap import sitemap_candidates
 from .urls import normalize_url
 
 log = logging.getLogger("cc_docs_scraper")
 
 
+def _shard_arg(spec: str) -> tuple[int, int]:
+    """argparse ``type`` wrapper around :func:`parse_shard`."""
+    try:
+        return parse_shard(spec)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+def _normalizers_arg(spec: str) -> tuple[str, ...]:
+    """argparse ``type`` wrapper around :func:`parse_normalizers`."""
+    try:
+        return parse_normalizers(spec)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+def _fetch_fn(
+    args: argparse.Namespace,
+    manifest: dict,
+    http2: Http2Fetcher | None = None,
+) -> FetchFn:
+    """Pick the page fetch strategy for this run."""
+    if args.probe:
+        return make_probe_fetch(manifest)
+    return http2 or fetch_markdown
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Download and mirror Claude Code documentation "
@@ -22,6 +70,12 @@ def main() -> None:
         action="store_true",
         help="Re-fetch and report changes without writing files.",
     )
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help="With --verify, compare HEAD metadata (ETag, Last-Modified, "
+        "Content-Length) instead of downloading every changed page.",
+    )
     parser.add_argument(
         "--url",
         type=str,
@@ -33,74 +87,215 @@ def main() -> None:
         help="Ignore cached timestamps, thresholds, and re-download "
         "everything.",
     )
+    parser.add_argument(
+        "--shard",
+        type=_shard_arg,
+        metavar="I/N",
+        help="Only process shard I of N (URLs are assigned by a stable "
+        "hash) and write a manifest fragment instead of manifest.json.",
+    )
+    parser.add_argument(
+        "--sitemap",
+        action="store_true",
+        help="Use sitemap.xml <lastmod> dates to only revalidate pages "
+        "that may have changed (with a full sweep every 7 days).",
+    )
+    parser.add_argument(
+        "--normalize",
+        type=_normalizers_arg,
+        default=DEFAULT_NORMALIZERS,
+        metavar="LIST",
+        help="Comma-separated normalizers that mask volatile content "
+        "before change detection (%s; default: none). Masked changes "
+        "are not written to the mirror." % ",".join(NORMALIZERS),
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate GET when a request takes longer than the "
+        "observed p95 latency and use whichever answers first "
+        "(at most one extra request per 10).",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Fetch pages over one multiplexed HTTP/2 connection, up to 8 "
+        "requests at a time (needs the 'http2' extra).",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record",
+        type=Path,
+        metavar="CASSETTE",
+        help="Record every HTTP exchange of this run to CASSETTE.",
+    )
+    cassette_group.add_argument(
+        "--replay",
+        type=Path,
+        metavar="CASSETTE",
+        help="Serve all HTTP traffic from CASSETTE instead of the network "
+        "(no rate-limit delays unless --replay-timing is given).",
+    )
+    parser.add_argument(
+        "--replay-timing",
+        action="store_true",
+        help="With --replay, preserve the recorded per-request latency.",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser(
+        "merge",
+        help="Merge shard manifest fragments into manifest.json.",
+    )
+    fsck_parser = subparsers.add_parser(
+        "fsck",
+        help="Check docs/ against manifest.json for orphaned and missing "
+        "page files.",
+    )
+    fsck_parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="Delete orphaned files and re-fetch only the missing pages.",
+    )
     args = parser.parse_args()
 
+    if args.replay_timing and not args.replay:
+        parser.error("--replay-timing requires --replay")
+    if args.hedge and args.replay:
+        parser.error("--hedge cannot be combined with --replay")
+    if args.http2 and (args.record or args.replay):
+        parser.error("--http2 cannot be combined with --record/--replay")
+    if args.http2 and (args.probe or args.hedge):
+        parser.error("--http2 cannot be combined with --probe or --hedge")
+
+    if args.hedge:
+        set_hedging(HedgeBudget())
+
+    http2 = None
+    if args.http2:
+        try:
+            http2 = Http2Fetcher()
+        except RuntimeError as exc:
+            parser.error(str(exc))
+
+    cassette = None
+    if args.record:
+        cassette = Cassette()
+        set_session(recording_session(cassette))
+    elif args.replay:
+        set_session(replay_session(
+            Cassette.load(args.replay), timing=args.replay_timing,
+        ))
+
+    try:
+        _run(parser, args, http2)
+    finally:
+        if cassette is not None:
+            cassette.save(args.record)
+        if http2 is not None:
+            http2.close()
+
+
+def _run(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    http2: Http2Fetcher | None = None,
+) -> None:
+    """Execute the command selected by *args*."""
+    if args.command == "merge":
+        try:
+            merged = merge_fragments()
+        except ValueError as exc:
+            log.error("Merge failed: %s", exc)
+            sys.exit(1)
+        log.info("Merged %d shard fragment(s) into %s", merged, MANIFEST_FILE)
+        return
+
+    # Replays run at full speed unless the original timing is wanted;
+    # over HTTP/2 the delay paces how fast the read-ahead window refills
+    rate_limit = not args.replay or args.replay_timing
+
+    if args.command == "fsck":
+        manifest = load_manifest()
+        result = check_mirror(manifest)
+        if result.clean:
+            return
+        if not args.repair:
+            sys.exit(1)
+        stats = repair_mirror(
+            result, manifest,
+            fetch_fn=http2 or fetch_markdown,
+            report_dir=REPORT_DIR,
+            chunk_index_file=CHUNK_INDEX_FILE,
+            rate_limit=rate_limit,
+            normalizers=args.normalize,
+        )
+        if stats.get("failed"):
+            sys.exit(1)
+        return
+
+    if args.probe and not args.verify:
+        parser.error("--probe requires --verify")
+    if args.url and args.shard:
+        parser.error("--url cannot be combined with --shard")
+
     manifest = load_manifest()
+    manifest_file = MANIFEST_FILE
 
     if args.url:
         url = normalize_url(args.url)
         run_fetch(
             [url], manifest,
             verify_only=args.verify, force=args.force,
+            fetch_fn=_fetch_fn(args, manifest, http2),
+            report_dir=REPORT_DIR,
+            chunk_index_file=CHUNK_INDEX_FILE,
+            rate_limit=rate_limit,
+            normalizers=args.normalize,
         )
         return
 
-    # Phase 1: fetch the doc index, checking if it changed
-    stored_index_lm = None if args.force else manifest.get(
-        "index_last_modified"
-    )
-    index_urls, new_index_lm = fetch_doc_index(
-        last_modified=stored_index_lm,
-    )
-
-    if index_urls is None:
-        # Index unchanged — but individual pages may still have changed.
-        # Rebuild URL list from manifest.
-        index_urls = sorted(
-            meta["url"]
-            for meta in manifest.get("files", {}).values()
-            if "url" in meta
-        )
-        if not index_urls:
-            log.error("No doc URLs in index or manifest.")
-            sys.exit(1)
+    known_count = len(manifest.get("files", {}))
+    report_dir = REPORT_DIR
+    if args.shard:
+        shard, shard_count = args.shard
+        manifest = shard_manifest(manifest, shard, shard_count)
+        manifest_file = fragment_path(shard, shard_count)
+        report_dir = REPORT_DIR / f"shard-{shard}-of-{shard_count}"
         log.info(
-            "Index unchanged; checking %d known pages for updates",
-            len(index_urls),
+            "Shard %d/%d: %d of %d known pages",
+            shard, shard_count, len(manifest["files"]), known_count,
         )
-    else:
-        if not index_urls:
-            log.error("No doc URLs found in index.")
-            sys.exit(1)
 
-        # Threshold: catch massive URL count drops before touching files
-        if not args.force:
-            prev_count = len(manifest.get("files", {}))
-            if prev_count > 0 and len(index_urls) < prev_count * 0.5:
-                log.error(
-                    "THRESHOLD: index returned %d URLs but manifest "
-                    "has %d files (>50%% drop). Possible site migration "
-                    "or index breakage. Aborting to protect local "
-                    "mirror. Use --force to override.",
-                    len(index_urls), prev_count,
-                )
-                sys.exit(2)
-
-        # Phase 1b: detect removed pages
-        removed = remove_stale_files(
-            index_urls, manifest, verify_only=args.verify,
+    # Phase 1: fetch the doc index and prune pages that left it
+    try:
+        index_urls = discover_urls(
+            manifest, verify_only=args.verify, force=args.force,
+            shard=args.shard,
         )
-        if removed:
-            log.info("Removed %d stale file(s)", removed)
+    except ThresholdError as exc:
+        log.error("%s", exc)
+        sys.exit(2)
+    except MirrorError as exc:
+        log.error("%s", exc)
+        sys.exit(1)
 
-        # Store new index timestamp
-        if new_index_lm and not args.verify:
-            manifest["index_last_modified"] = new_index_lm
+    # Phase 1c: narrow the pages down using sitemap.xml
+    fetch_urls = index_urls
+    if args.sitemap:
+        fetch_urls = sitemap_candidates(
+            index_urls, manifest, verify_only=args.verify, force=args.force,
+        )
 
     # Phase 2: conditionally fetch each page
     stats = run_fetch(
-        index_urls, manifest,
+        fetch_urls, manifest,
         verify_only=args.verify, force=args.force,
+        fetch_fn=_fetch_fn(args, manifest, http2),
+        manifest_file=manifest_file,
+        report_dir=report_dir,
+        chunk_index_file=CHUNK_INDEX_FILE,
+        rate_limit=rate_limit,
+        normalizers=args.normalize,
     )
 
     # Phase 3: post-fetch threshold check
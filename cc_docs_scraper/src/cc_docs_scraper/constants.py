@@ -5,14 +5,29 @@ from pathlib import Path
 
 BASE_URL = "https://code.claude.com"
 INDEX_URL = f"{BASE_URL}/docs/llms.txt"
+SITEMAP_URL = f"{BASE_URL}/sitemap.xml"
 ALLOWED_HOSTS = {"code.claude.com", "docs.anthropic.com"}
 DOC_PREFIX = "/docs/en/"
 OUTPUT_DIR = Path("docs")
 MANIFEST_FILE = OUTPUT_DIR / "manifest.json"
+CHUNK_INDEX_FILE = OUTPUT_DIR / "chunks.json"
+REPORT_DIR = OUTPUT_DIR / ".reports"
 REQUEST_TIMEOUT = 30  # seconds
+MIN_REQUEST_TIMEOUT = 5  # floor for latency-derived timeouts
+LATENCY_WINDOW = 50  # recent responses kept per host
+LATENCY_MIN_SAMPLES = 10  # before timeouts adapt or hedging starts
+LATENCY_TIMEOUT_FACTOR = 4  # timeout = p95 × factor
+HEDGE_RATIO = 0.1  # at most one hedged duplicate per 10 requests
+HTTP2_MAX_STREAMS = 8  # concurrent requests on the --http2 connection
 MAX_RETRIES = 3
 RETRY_BASE_DELAY = 1.0  # seconds
+FULL_SWEEP_INTERVAL = 7 * 24 * 3600  # seconds between full sweeps
+WRITE_QUEUE_SIZE = 32  # pages buffered ahead of the disk writer
+WRITE_BATCH_SIZE = 16  # pages per fsync batch
+READER_CACHE_BYTES = 64 * 1024 * 1024  # mapped pages kept by MirrorReader
+FSCK_WORKERS = 8  # threads listing directories in fsck
 USER_AGENT = "claude-code-docs-scraper/1.0"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"  # UTC, used for manifest times
 
 logging.basicConfig(
     level=logging.INFO,
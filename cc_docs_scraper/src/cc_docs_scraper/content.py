@@ -1,10 +1,14 @@
-"""Content hashing and markdown validation."""
+"""Content hashing, markdown validation, and section splitting."""
 
 import hashlib
 import logging
+import re
 
 log = logging.getLogger("cc_docs_scraper")
 
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
 
 def compute_hash(content: str) -> str:
     """Return the SHA-256 hex digest of *content*."""
@@ -29,3 +33,38 @@ def validate_markdown(url: str, content: str) -> bool:
         return False
 
     return True
+
+
+def split_sections(content: str) -> list[tuple[str, str]]:
+    """Split markdown *content* into heading-delimited sections.
+
+    Returns ``(heading, text)`` pairs in document order, where *text*
+    includes the heading line itself.  Text before the first heading is
+    returned under the empty heading ``""`` (omitted when blank).
+    Heading-like lines inside fenced code blocks are ignored.
+    """
+    sections: list[tuple[str, str]] = []
+    heading = ""
+    lines: list[str] = []
+    fence: str | None = None
+
+    for line in content.splitlines(keepends=True):
+        fence_match = _FENCE_RE.match(line)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker == fence:
+                fence = None
+        elif fence is None:
+            match = _HEADING_RE.match(line)
+            if match:
+                if heading or "".join(lines).strip():
+                    sections.append((heading, "".join(lines)))
+                heading = match.group(2)
+                lines = []
+        lines.append(line)
+
+    if heading or "".join(lines).strip():
+        sections.append((heading, "".join(lines)))
+    return sections
@@ -0,0 +1,235 @@
+"""Line diffs and per-page change reports.
+
+The diff engine interns every distinct line as an integer first, so all
+comparisons are integer compares, then runs a patience diff: lines that
+occur exactly once on both sides anchor the alignment (longest
+increasing subsequence, O(n log n)) and the gaps between anchors are
+diffed recursively.  Gaps with no unique lines (typically runs of
+blank lines and fence markers) are handed to ``difflib`` only while
+they are small; larger ones become a single replace block instead of
+falling into ``difflib``'s quadratic worst case.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Sequence
+
+from .content import split_sections
+
+Opcode = tuple[str, int, int, int, int]
+
+# Largest anchor-less gap (old lines x new lines) diffed with difflib
+SMALL_GAP = 10_000
+
+
+def _unique_anchors(
+    a: Sequence[int], b: Sequence[int],
+    alo: int, ahi: int, blo: int, bhi: int,
+) -> list[tuple[int, int]]:
+    """Return the longest in-order run of lines unique to both ranges."""
+    count_a = Counter(a[alo:ahi])
+    count_b = Counter(b[blo:bhi])
+    pos_b = {
+        b[j]: j for j in range(blo, bhi)
+        if count_b[b[j]] == 1
+    }
+    candidates = [
+        (i, pos_b[a[i]]) for i in range(alo, ahi)
+        if count_a[a[i]] == 1 and a[i] in pos_b
+    ]
+    if not candidates:
+        return []
+
+    # Patience sorting: longest increasing subsequence on the b index
+    tails: list[int] = []  # b index at the end of each pile
+    tail_idx: list[int] = []  # candidate index at the end of each pile
+    back: list[int] = []
+    for k, (_, j) in enumerate(candidates):
+        pile = bisect_left(tails, j)
+        back.append(tail_idx[pile - 1] if pile else -1)
+        if pile == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[pile] = j
+            tail_idx[pile] = k
+
+    anchors = []
+    k = tail_idx[-1]
+    while k != -1:
+        anchors.append(candidates[k])
+        k = back[k]
+    anchors.reverse()
+    return anchors
+
+
+def _matching_pairs(
+    a: Sequence[int],
+    b: Sequence[int],
+) -> list[tuple[int, int]]:
+    """Return the ``(i, j)`` pairs of matched lines, in order."""
+    pairs: list[tuple[int, int]] = []
+    # Work stack of ranges to diff and pairs to emit, processed in order
+    stack: list[tuple[int, ...]] = [(0, len(a), 0, len(b))]
+
+    while stack:
+        item = stack.pop()
+        if len(item) == 2:
+            pairs.append(item)
+            continue
+
+        alo, ahi, blo, bhi = item
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        suffix = []
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            suffix.append((ahi, bhi))
+
+        todo: list[tuple[int, ...]] = []
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        i, j = alo, blo
+        for ai, bj in anchors:
+            if ai > i and bj > j:
+                todo.append((i, ai, j, bj))
+            todo.append((ai, bj))
+            i, j = ai + 1, bj + 1
+        if anchors and ahi > i and bhi > j:
+            todo.append((i, ahi, j, bhi))
+        elif not anchors and (ahi - alo) * (bhi - blo) <= SMALL_GAP:
+            matcher = SequenceMatcher(
+                None, a[alo:ahi], b[blo:bhi], autojunk=False,
+            )
+            for bi, bj, size in matcher.get_matching_blocks():
+                todo.extend((alo + bi + k, blo + bj + k) for k in range(size))
+        todo.extend(reversed(suffix))
+
+        stack.extend(reversed(todo))
+
+    return pairs
+
+
+def diff_lines(a: Sequence[str], b: Sequence[str]) -> list[Opcode]:
+    """Diff two line sequences.
+
+    Returns ``difflib``-style opcodes ``(tag, i1, i2, j1, j2)`` with
+    tags ``equal``, ``replace``, ``delete`` and ``insert``.
+    """
+    ids: dict[str, int] = {}
+    ha = [ids.setdefault(line, len(ids)) for line in a]
+    hb = [ids.setdefault(line, len(ids)) for line in b]
+
+    ops: list[list] = []
+    i = j = 0
+    for mi, mj in _matching_pairs(ha, hb) + [(len(a), len(b))]:
+        if mi > i or mj > j:
+            if mi > i and mj > j:
+                tag = "replace"
+            else:
+                tag = "delete" if mi > i else "insert"
+            ops.append([tag, i, mi, j, mj])
+        if mi == len(a) and mj == len(b):
+            break
+        if ops and ops[-1][0] == "equal" and ops[-1][2] == mi:
+            ops[-1][2] += 1
+            ops[-1][4] += 1
+        else:
+            ops.append(["equal", mi, mi + 1, mj, mj + 1])
+        i, j = mi + 1, mj + 1
+
+    return [tuple(op) for op in ops]
+
+
+def _range(start: int, length: int) -> str:
+    """Format a unified-diff line range (1-based, like ``diff -u``)."""
+    if length == 1:
+        return str(start + 1)
+    if not length:
+        start -= 1
+    return f"{start + 1},{length}"
+
+
+def unified_hunks(
+    a: Sequence[str],
+    b: Sequence[str],
+    opcodes: list[Opcode],
+    context: int = 3,
+) -> list[str]:
+    """Render *opcodes* as unified-diff hunks with *context* lines."""
+    # Group changes whose context windows overlap into one hunk
+    groups: list[list[Opcode]] = []
+    for op in opcodes:
+        tag, i1, i2, j1, j2 = op
+        if tag == "equal":
+            continue
+        if groups and i1 - groups[-1][-1][2] <= 2 * context:
+            groups[-1].append(op)
+        else:
+            groups.append([op])
+
+    hunks = []
+    for group in groups:
+        a_start = max(group[0][1] - context, 0)
+        b_start = max(group[0][3] - context, 0)
+        a_end = min(group[-1][2] + context, len(a))
+        b_end = min(group[-1][4] + context, len(b))
+
+        lines = [
+            f"@@ -{_range(a_start, a_end - a_start)} "
+            f"+{_range(b_start, b_end - b_start)} @@"
+        ]
+        i = a_start
+        for _tag, i1, i2, j1, j2 in group:
+            lines.extend(f" {line}" for line in a[i:i1])
+            lines.extend(f"-{line}" for line in a[i1:i2])
+            lines.extend(f"+{line}" for line in b[j1:j2])
+            i = i2
+        lines.extend(f" {line}" for line in a[i:a_end])
+        hunks.append("\n".join(lines))
+
+    return hunks
+
+
+def _keyed_sections(content: str) -> dict[str, str]:
+    """Map section headings to text, numbering repeated headings."""
+    keyed: dict[str, str] = {}
+    for heading, text in split_sections(content):
+        key, n = heading, 1
+        while key in keyed:
+            n += 1
+            key = f"{heading} ({n})"
+        keyed[key] = text
+    return keyed
+
+
+def page_change_report(old: str, new: str) -> dict:
+    """Summarize the change from *old* to *new* page content.
+
+    Returns line counts, the headings of added, removed and modified
+    sections, and unified-diff hunks.
+    """
+    a, b = old.splitlines(), new.splitlines()
+    opcodes = diff_lines(a, b)
+
+    changes = [op for op in opcodes if op[0] != "equal"]
+
+    old_sections = _keyed_sections(old)
+    new_sections = _keyed_sections(new)
+
+    return {
+        "lines_added": sum(j2 - j1 for _, _, _, j1, j2 in changes),
+        "lines_removed": sum(i2 - i1 for _, i1, i2, _, _ in changes),
+        "sections": {
+            "added": [k for k in new_sections if k not in old_sections],
+            "removed": [k for k in old_sections if k not in new_sections],
+            "modified": [
+                k for k in new_sections
+                if k in old_sections and old_sections[k] != new_sections[k]
+            ],
+        },
+        "hunks": unified_hunks(a, b, opcodes),
+    }
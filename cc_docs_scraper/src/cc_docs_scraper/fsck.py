@@ -0,0 +1,131 @@
+"""Consistency check of the mirror: files on disk vs. the manifest."""
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple
+
+from .constants import FSCK_WORKERS, OUTPUT_DIR
+from .orchestrator import run_fetch
+
+log = logging.getLogger("cc_docs_scraper")
+
+
+class FsckResult(NamedTuple):
+    """Differences between the output directory and the manifest."""
+
+    orphans: list[Path]  # page files the manifest does not know
+    missing: list[Path]  # manifest entries whose file is gone
+
+    @property
+    def clean(self) -> bool:
+        return not self.orphans and not self.missing
+
+
+def _scan_dir(directory: str) -> tuple[list[str], list[str]]:
+    """Return the ``.md`` files and subdirectories of *directory*.
+
+    Dot entries (reports, temp files) are skipped.
+    """
+    pages: list[str] = []
+    subdirs: list[str] = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith(".md") and entry.is_file(
+                follow_symlinks=False,
+            ):
+                pages.append(entry.path)
+    return pages, subdirs
+
+
+def scan_pages(
+    output_dir: Path = OUTPUT_DIR,
+    *,
+    workers: int = FSCK_WORKERS,
+) -> set[str]:
+    """Return every page file under *output_dir*, as manifest keys.
+
+    Directories are listed with ``os.scandir`` on a thread pool, each
+    subdirectory being submitted as soon as its parent is read.
+    """
+    if not output_dir.is_dir():
+        return set()
+
+    found: set[str] = set()
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="cc-docs-fsck",
+    ) as pool:
+        pending = {pool.submit(_scan_dir, str(output_dir))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pages, subdirs = future.result()
+                found.update(str(Path(page)) for page in pages)
+                pending |= {pool.submit(_scan_dir, d) for d in subdirs}
+    return found
+
+
+def check_mirror(
+    manifest: dict,
+    output_dir: Path = OUTPUT_DIR,
+    *,
+    workers: int = FSCK_WORKERS,
+) -> FsckResult:
+    """Compare the page files under *output_dir* with *manifest*."""
+    on_disk = scan_pages(output_dir, workers=workers)
+    known = {str(Path(key)) for key in manifest.get("files", {})}
+    result = FsckResult(
+        orphans=sorted(Path(key) for key in on_disk - known),
+        missing=sorted(Path(key) for key in known - on_disk),
+    )
+    for path in result.orphans:
+        log.warning("  orphan  %s (not in manifest)", path)
+    for path in result.missing:
+        log.warning("  missing %s (in manifest, not on disk)", path)
+    log.info(
+        "fsck: %d page file(s), %d orphan(s), %d missing",
+        len(on_disk), len(result.orphans), len(result.missing),
+    )
+    return result
+
+
+def repair_mirror(
+    result: FsckResult,
+    manifest: dict,
+    *,
+    output_dir: Path = OUTPUT_DIR,
+    **fetch_kwargs,
+) -> dict[str, int]:
+    """Delete orphans and re-fetch just the missing pages.
+
+    Missing entries keep their place in the manifest but lose their
+    hashes and validators, so the pages are downloaded and written as
+    new; a page that still fails stays tracked (and missing) for the
+    next run.  *fetch_kwargs* are passed to
+    :func:`~cc_docs_scraper.orchestrator.run_fetch`.  Returns the
+    re-fetch stats.
+    """
+    for path in result.orphans:
+        path.unlink(missing_ok=True)
+        log.info("  deleted %s (orphan)", path)
+
+    files = manifest.setdefault("files", {})
+    urls = []
+    for path in result.missing:
+        entry = files.get(str(path), {})
+        if "url" in entry:
+            for field in ("sha256", "semantic_sha256", "last_modified"):
+                entry.pop(field, None)
+            urls.append(entry["url"])
+
+    if not urls:
+        return {}
+    log.info("Re-fetching %d missing page(s)", len(urls))
+    return run_fetch(
+        urls, manifest, force=True, output_dir=output_dir, **fetch_kwargs,
+    )
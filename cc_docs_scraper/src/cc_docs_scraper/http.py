@@ -1,55 +1,300 @@
-"""HTTP fetching with retry logic."""
+"""HTTP fetching with retry logic and cache freshness."""
 
+import calendar
+import functools
+import io
 import logging
 import random
 import re
 import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Mapping, NamedTuple
+from urllib.parse import urlparse
 
 import requests
+import urllib3
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+from urllib3.util.request import ACCEPT_ENCODING as _DECODABLE_ENCODINGS
 
 from .constants import (
     INDEX_URL,
     MAX_RETRIES,
-    REQUEST_TIMEOUT,
     RETRY_BASE_DELAY,
+    TIMESTAMP_FORMAT,
     USER_AGENT,
 )
 from .content import validate_markdown
+from .latency import HedgeBudget, LatencyTracker, hedged_request
 from .urls import validate_url
 
 log = logging.getLogger("cc_docs_scraper")
 
+# Content codings urllib3 can decode here: gzip and deflate always, br
+# and zstd when brotli / zstandard are installed (the "compression"
+# extra).  Sent explicitly instead of relying on library defaults.
+ACCEPT_ENCODING = ", ".join(_DECODABLE_ENCODINGS.split(","))
+
+_READ_SIZE = 64 * 1024  # raw body bytes per read in wire_bytes()
+
+_session: requests.Session | None = None
+_trackers: dict[str, LatencyTracker] = {}
+_hedge_budget: HedgeBudget | None = None
+
+
+def get_session() -> requests.Session:
+    """Return the shared HTTP session, creating it on first use."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def set_session(session: requests.Session | None) -> None:
+    """Replace the shared HTTP session (``None`` resets to a fresh one).
+
+    This is the transport seam used for recording and replaying runs.
+    """
+    global _session
+    _session = session
+
+
+def latency_tracker(url: str) -> LatencyTracker:
+    """Return the latency tracker for *url*'s host."""
+    host = urlparse(url).hostname or ""
+    return _trackers.setdefault(host, LatencyTracker())
+
+
+def set_hedging(budget: HedgeBudget | None) -> None:
+    """Enable hedged GETs limited by *budget* (``None`` disables them)."""
+    global _hedge_budget
+    _hedge_budget = budget
+
+
+class FetchResult(NamedTuple):
+    """Outcome of fetching one doc page.
+
+    The leading fields match the plain ``(content, last_modified,
+    was_not_modified)`` tuple that fetch functions used to return, and
+    a 3-tuple is still accepted wherever a ``FetchResult`` is expected.
+    """
+
+    content: str | None
+    last_modified: str | None
+    not_modified: bool
+    fresh_until: str | None = None
+    etag: str | None = None
+    # Set by the HEAD probe when metadata shows the page changed but no
+    # body was downloaded (``content`` is ``None``).
+    changed: bool = False
+    # Set when the request failed in a way worth retrying later.
+    retryable: bool = False
+    # Body size as transferred (possibly compressed) and once decoded.
+    wire_bytes: int = 0
+    decoded_bytes: int = 0
+
+
+def _parse_http_date(value: str | None) -> float | None:
+    """Return an HTTP-date header value as a POSIX timestamp."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_deadline(
+    headers: Mapping[str, str],
+    now: float | None = None,
+) -> str | None:
+    """Return when a response stops being fresh, or ``None``.
+
+    Follows the RFC 9111 freshness model for a private cache:
+    ``Cache-Control: max-age`` takes precedence over ``Expires`` (which
+    is measured against ``Date``), and the ``Age`` the response already
+    spent in upstream caches is subtracted.  ``no-cache`` and
+    ``no-store`` always yield ``None``.  The deadline is formatted with
+    :data:`TIMESTAMP_FORMAT`.
+    """
+    now = time.time() if now is None else now
+
+    directives: dict[str, str] = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    if "no-cache" in directives or "no-store" in directives:
+        return None
+
+    lifetime: float | None = None
+    if "max-age" in directives:
+        try:
+            lifetime = int(directives["max-age"])
+        except ValueError:
+            return None
+    elif "Expires" in headers:
+        expires = _parse_http_date(headers["Expires"])
+        if expires is None:
+            return None  # invalid Expires means already stale
+        date = _parse_http_date(headers.get("Date"))
+        lifetime = expires - (now if date is None else date)
+
+    if lifetime is None:
+        return None
+
+    try:
+        age = max(int(headers.get("Age", 0)), 0)
+    except ValueError:
+        age = 0
+
+    remaining = lifetime - age
+    if remaining <= 0:
+        return None
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(now + remaining))
+
+
+def is_fresh(fresh_until: str | None, now: float | None = None) -> bool:
+    """Return True if the stored *fresh_until* deadline has not passed."""
+    if not fresh_until:
+        return False
+    try:
+        deadline = calendar.timegm(
+            time.strptime(fresh_until, TIMESTAMP_FORMAT)
+        )
+    except ValueError:
+        return False
+    return (time.time() if now is None else now) < deadline
+
+
+def wire_bytes(resp: requests.Response) -> int:
+    """Read *resp*'s body and return how many bytes it took on the wire.
+
+    For an unread urllib3 body (``stream=True``) the raw bytes are
+    counted as they arrive, then decoded and stored so ``resp.content``
+    works as usual; urllib3's own ``tell()`` stays at 0 for chunked
+    bodies.  An already-read response reports ``raw.tell()`` where the
+    raw stream has one (replayed exchanges do), else the decoded size.
+    """
+    raw = resp.raw
+    if not resp._content_consumed and isinstance(raw, urllib3.HTTPResponse):
+        return _read_counted(resp)
+    tell = getattr(raw, "tell", None)
+    if tell is not None:
+        try:
+            return int(tell())
+        except (OSError, TypeError, ValueError):
+            pass
+    return len(resp.content)
+
+
+def _read_counted(resp: requests.Response) -> int:
+    """Read and decode *resp*'s raw body, returning its encoded size."""
+    raw = resp.raw
+    try:
+        body = b"".join(raw.stream(_READ_SIZE, decode_content=False))
+        decoder = urllib3.HTTPResponse(
+            body=io.BytesIO(body),
+            headers=raw.headers,
+            preload_content=False,
+        )
+        resp._content = decoder.read(decode_content=True)
+        resp._content_consumed = True
+    except ProtocolError as exc:
+        raise requests.exceptions.ChunkedEncodingError(exc)
+    except DecodeError as exc:
+        raise requests.exceptions.ContentDecodingError(exc)
+    except ReadTimeoutError as exc:
+        raise requests.ConnectionError(exc)
+    finally:
+        resp.close()  # releases the connection once the body is read
+    return len(body)
+
+
+def retry_delay(attempt: int) -> float:
+    """Back-off before retrying after failed *attempt* (1-based)."""
+    return RETRY_BASE_DELAY * (2 ** (attempt - 1)) + random.uniform(0, 0.5)
+
+
+def request_headers(
+    if_modified_since: str | None = None,
+    *,
+    if_none_match: str | None = None,
+    method: str = "GET",
+) -> dict[str, str]:
+    """Return the headers for a (conditional) request to the docs site."""
+    headers = {"User-Agent": USER_AGENT}
+    if if_modified_since:
+        headers["If-Modified-Since"] = if_modified_since
+    if if_none_match:
+        headers["If-None-Match"] = if_none_match
+    if method == "HEAD":
+        headers["Accept-Encoding"] = "identity"
+    else:
+        headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return headers
+
 
 def request_with_retry(
     url: str,
     if_modified_since: str | None = None,
+    *,
+    if_none_match: str | None = None,
+    method: str = "GET",
+    session: requests.Session | None = None,
+    attempts: int = MAX_RETRIES,
+    stream: bool = False,
 ) -> requests.Response:
-    """GET *url* with exponential back-off and jitter.
+    """Request *url* (GET by default) with exponential back-off and jitter.
+
+    Tries up to *attempts* times, sleeping between tries; with
+    ``attempts=1`` the first error is raised to the caller.
 
-    When *if_modified_since* is provided, sends the ``If-Modified-Since``
-    header.  A 304 response is returned directly (not raised as an error).
+    When *if_modified_since* / *if_none_match* are provided, sends the
+    matching conditional headers.  A 304 response is returned directly
+    (not raised as an error).  ``HEAD`` requests ask for the identity
+    encoding so ``Content-Length`` describes the decoded body.  Uses
+    *session* if given, else the shared session.  With *stream*, the
+    body is left unread for the caller (who must close the response).
+
+    The timeout comes from the host's :class:`LatencyTracker` (see
+    :func:`latency_tracker`); a timed-out attempt is recorded there, so
+    the next attempt at *url* waits twice as long.  When hedging is enabled
+    (:func:`set_hedging`), a GET still pending after the host's p95 is
+    duplicated and the first answer wins.
     """
     validate_url(url)
-    headers = {"User-Agent": USER_AGENT}
-    if if_modified_since:
-        headers["If-Modified-Since"] = if_modified_since
+    session = session or get_session()
+    headers = request_headers(
+        if_modified_since, if_none_match=if_none_match, method=method,
+    )
 
-    for attempt in range(MAX_RETRIES):
+    tracker = latency_tracker(url)
+    for attempt in range(attempts):
+        timeout = tracker.timeout(url)
         try:
-            resp = requests.get(
-                url, headers=headers, timeout=REQUEST_TIMEOUT
+            send = functools.partial(
+                session.request,
+                method, url, headers=headers, timeout=timeout,
+                stream=stream,
             )
+            started = time.monotonic()
+            if method == "GET" and _hedge_budget is not None:
+                resp = hedged_request(
+                    send, delay=tracker.hedge_delay(), budget=_hedge_budget,
+                )
+            else:
+                resp = send()
+            tracker.record(time.monotonic() - started, url)
             if resp.status_code == 304:
                 return resp
             resp.raise_for_status()
             return resp
         except requests.RequestException as exc:
-            if attempt == MAX_RETRIES - 1:
+            if isinstance(exc, requests.Timeout):
+                tracker.record_timeout(timeout, url)
+            if attempt == attempts - 1:
                 raise
-            delay = (
-                RETRY_BASE_DELAY * (2 ** attempt)
-                + random.uniform(0, 0.5)
-            )
+            delay = retry_delay(attempt + 1)
             log.warning(
                 "Attempt %d for %s failed (%s), retrying in %.1fs …",
                 attempt + 1, url, exc, delay,
@@ -61,19 +306,24 @@ def request_with_retry(
 
 def fetch_doc_index(
     last_modified: str | None = None,
-) -> tuple[list[str] | None, str | None]:
-    """Fetch llms.txt and return doc URLs and Last-Modified header.
+    *,
+    session: requests.Session | None = None,
+) -> tuple[list[str] | None, str | None, str | None]:
+    """Fetch llms.txt and return doc URLs, Last-Modified, and freshness.
 
     Uses ``If-Modified-Since`` when *last_modified* is provided.
-    Returns ``(None, stored_last_modified)`` on 304 (no change to the
-    URL list itself).
+    Returns ``(None, stored_last_modified, fresh_until)`` on 304 (no
+    change to the URL list itself).
     """
     log.info("Fetching doc index from %s", INDEX_URL)
-    resp = request_with_retry(INDEX_URL, if_modified_since=last_modified)
+    resp = request_with_retry(
+        INDEX_URL, if_modified_since=last_modified, session=session,
+    )
+    fresh_until = freshness_deadline(resp.headers)
 
     if resp.status_code == 304:
         log.info("Doc index unchanged (304)")
-        return None, last_modified
+        return None, last_modified, fresh_until
 
     urls: list[str] = []
     for match in re.finditer(
@@ -84,31 +334,183 @@ def fetch_doc_index(
 
     new_last_modified = resp.headers.get("Last-Modified")
     log.info("Found %d doc URLs in index", len(urls))
-    return sorted(urls), new_last_modified
+    return sorted(urls), new_last_modified, fresh_until
 
 
 def fetch_markdown(
     url: str,
     if_modified_since: str | None = None,
-) -> tuple[str | None, str | None, bool]:
+    *,
+    session: requests.Session | None = None,
+) -> FetchResult:
     """Fetch a markdown doc page with conditional request support.
 
-    Returns ``(content, last_modified_header, was_not_modified)``.
-    - 304 → ``(None, None, True)``
-    - 200 with valid markdown → ``(content, last_modified, False)``
-    - failure/invalid → ``(None, None, False)``
+    Returns a :class:`FetchResult`; ``fresh_until`` is set on both 200
+    and 304 responses when the server sent freshness information.
+    - 304 → ``(None, None, True, fresh_until)``
+    - 200 with valid markdown → ``(content, last_modified, False,
+      fresh_until)``
+    - invalid content → ``(None, None, False)``
+    - request error → ``(None, None, False)`` with ``retryable`` set
+
+    ``wire_bytes`` / ``decoded_bytes`` record the body size before and
+    after content decoding whenever a response arrived.
+
+    Makes a single attempt; :func:`~cc_docs_scraper.orchestrator.iter_fetch`
+    retries failed pages from its deferred queue.
+    """
+    try:
+        resp = request_with_retry(
+            url, if_modified_since=if_modified_since, session=session,
+            attempts=1, stream=True,
+        )
+        size = wire_bytes(resp)
+    except requests.RequestException as exc:
+        log.warning("Failed to fetch %s: %s", url, exc)
+        return FetchResult(None, None, False, retryable=True)
+
+    return markdown_result(
+        url, resp.status_code, resp.headers, resp.text,
+        wire_bytes=size,
+        decoded_bytes=len(resp.content),
+    )
+
+
+def markdown_result(
+    url: str,
+    status_code: int,
+    headers: Mapping[str, str],
+    text: str,
+    *,
+    wire_bytes: int = 0,
+    decoded_bytes: int = 0,
+) -> FetchResult:
+    """Turn a successful (200 or 304) page response into a FetchResult.
+
+    Shared by every transport so they agree on 304 handling, freshness,
+    and markdown validation (see :func:`fetch_markdown`).
+    """
+    fresh_until = freshness_deadline(headers)
+    etag = headers.get("ETag")
+    sizes = {"wire_bytes": wire_bytes, "decoded_bytes": decoded_bytes}
+    log.debug(
+        "  %d bytes on the wire, %d decoded (%s)",
+        wire_bytes, decoded_bytes,
+        headers.get("Content-Encoding", "identity"),
+    )
+
+    if status_code == 304:
+        return FetchResult(None, None, True, fresh_until, etag, **sizes)
+
+    if not validate_markdown(url, text):
+        return FetchResult(None, None, False, **sizes)
+
+    return FetchResult(
+        text, headers.get("Last-Modified"), False, fresh_until, etag,
+        **sizes,
+    )
+
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def compare_metadata(
+    headers: Mapping[str, str],
+    entry: Mapping[str, Any],
+) -> str | None:
+    """Compare HEAD response *headers* against a manifest *entry*.
+
+    Returns ``"unchanged"``, ``"changed"``, or ``None`` when the
+    metadata cannot settle the question.  ETags are checked first
+    (a differing weak ETag is inconclusive), then the identity-encoded
+    ``Content-Length`` against the stored ``size``, then
+    ``Last-Modified``.
     """
+    etag, stored_etag = headers.get("ETag"), entry.get("etag")
+    if etag and stored_etag:
+        if _strip_weak(etag) == _strip_weak(stored_etag):
+            return "unchanged"
+        if not (etag.startswith("W/") or stored_etag.startswith("W/")):
+            return "changed"
+
+    length = headers.get("Content-Length")
+    encoding = headers.get("Content-Encoding", "identity")
+    if (
+        length is not None and length.isdigit()
+        and encoding == "identity"
+        and entry.get("size") is not None
+        and int(length) != entry["size"]
+    ):
+        return "changed"
+
+    last_modified = headers.get("Last-Modified")
+    if last_modified and last_modified == entry.get("last_modified"):
+        return "unchanged"
+
+    return None
+
+
+def probe_markdown(
+    url: str,
+    entry: Mapping[str, Any],
+    if_modified_since: str | None = None,
+) -> FetchResult:
+    """Check whether a known page changed using a conditional HEAD.
+
+    Only downloads the body (via :func:`fetch_markdown`) when the page
+    is not in the manifest yet or :func:`compare_metadata` is
+    inconclusive.  A page the metadata shows as changed is returned
+    with ``changed=True`` and no content.
+    """
+    if not entry.get("sha256"):
+        return fetch_markdown(url, if_modified_since)
+
     try:
-        resp = request_with_retry(url, if_modified_since=if_modified_since)
+        resp = request_with_retry(
+            url,
+            if_modified_since=if_modified_since,
+            if_none_match=entry.get("etag"),
+            method="HEAD",
+            attempts=1,
+        )
     except requests.RequestException as exc:
-        log.error("Failed to fetch %s: %s", url, exc)
-        return None, None, False
+        log.warning("Failed to probe %s: %s", url, exc)
+        return FetchResult(None, None, False, retryable=True)
+
+    fresh_until = freshness_deadline(resp.headers)
+    etag = resp.headers.get("ETag")
 
     if resp.status_code == 304:
-        return None, None, True
+        return FetchResult(None, None, True, fresh_until, etag)
+
+    verdict = compare_metadata(resp.headers, entry)
+    if verdict == "unchanged":
+        return FetchResult(None, None, True, fresh_until, etag)
+    if verdict == "changed":
+        return FetchResult(
+            None, resp.headers.get("Last-Modified"), False,
+            fresh_until, etag, changed=True,
+        )
+
+    log.debug("  probe inconclusive, fetching body")
+    return fetch_markdown(url, if_modified_since)
+
+
+def make_probe_fetch(
+    manifest: dict,
+) -> Callable[[str, str | None], FetchResult]:
+    """Return a fetch function that probes pages known to *manifest*."""
+    entries = {
+        meta["url"]: meta
+        for meta in manifest.get("files", {}).values()
+        if "url" in meta
+    }
 
-    content = resp.text
-    if not validate_markdown(url, content):
-        return None, None, False
+    def probe_fetch(
+        url: str,
+        if_modified_since: str | None = None,
+    ) -> FetchResult:
+        return probe_markdown(url, entries.get(url, {}), if_modified_since)
 
-    return content, resp.headers.get("Last-Modified"), False
+    return probe_fetch
@@ -0,0 +1,179 @@
+"""Optional HTTP/2 transport for page fetches.
+
+:class:`Http2Fetcher` is a drop-in ``fetch_fn`` for
+:func:`~cc_docs_scraper.orchestrator.run_fetch`.  Where ``requests``
+needs one connection per in-flight request, it multiplexes the
+conditional GETs as streams over one HTTP/2 connection per host.  It
+needs the ``http2`` extra (``httpx[http2]``).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+try:
+    import httpx
+except ImportError:  # the "http2" extra is not installed
+    httpx = None
+
+from .constants import HTTP2_MAX_STREAMS
+from .http import (
+    FetchResult,
+    latency_tracker,
+    markdown_result,
+    request_headers,
+)
+from .urls import validate_url
+
+log = logging.getLogger("cc_docs_scraper")
+
+
+class Http2Fetcher:
+    """Fetch doc pages over HTTP/2, optionally ahead of time.
+
+    Calling the fetcher behaves like
+    :func:`~cc_docs_scraper.http.fetch_markdown`: one attempt, the same
+    :class:`~cc_docs_scraper.http.FetchResult` outcomes, and failures
+    marked ``retryable`` for the caller's retry queue.  :meth:`prefetch`
+    queues many pages to be requested ahead of the caller, at most
+    *max_streams* in flight and ``2 * max_streams`` outstanding; each
+    call consumes one and tops the window up.  Calling the fetcher for
+    a prefetched URL and ``If-Modified-Since`` returns that response.
+
+    Requests run on one event loop in a background thread, so streams
+    open in order on the shared connection.  Pass *transport* to use a
+    preconfigured ``httpx.AsyncBaseTransport``.  Raises
+    ``RuntimeError`` if httpx is not installed.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_streams: int = HTTP2_MAX_STREAMS,
+        transport: "httpx.AsyncBaseTransport | None" = None,
+    ) -> None:
+        if httpx is None:
+            raise RuntimeError(
+                "HTTP/2 support needs the 'http2' extra "
+                "(pip install 'cc-docs-scraper[http2]')"
+            )
+        self.client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_streams),
+            transport=transport,
+        )
+        self._streams = asyncio.Semaphore(max_streams)
+        self._window = 2 * max_streams
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="cc-docs-h2", daemon=True,
+        )
+        self._thread.start()
+        # Pages queued by prefetch() but not yet requested
+        self._queued: deque[tuple[str, str | None]] = deque()
+        # url -> (If-Modified-Since it was sent with, pending response)
+        self._pending: dict[str, tuple[str | None, Future]] = {}
+
+    def prefetch(self, pages: list[tuple[str, str | None]]) -> None:
+        """Queue ``(url, If-Modified-Since)`` requests to run ahead."""
+        self._queued.extend(pages)
+        self._top_up()
+        log.debug("Prefetching %d page(s) over HTTP/2", len(pages))
+
+    def __call__(
+        self,
+        url: str,
+        if_modified_since: str | None = None,
+    ) -> FetchResult:
+        """Fetch *url* (see :func:`~cc_docs_scraper.http.fetch_markdown`)."""
+        future = None
+        pending = self._pending.pop(url, None)
+        if pending is not None:
+            if pending[0] == if_modified_since:
+                future = pending[1]
+            else:
+                pending[1].cancel()
+        if future is None:
+            future = self._submit(url, if_modified_since)
+        self._top_up()
+
+        try:
+            resp = future.result()
+        except httpx.HTTPError as exc:
+            log.warning("Failed to fetch %s: %s", url, exc)
+            return FetchResult(None, None, False, retryable=True)
+
+        return markdown_result(
+            url, resp.status_code, resp.headers, resp.text,
+            wire_bytes=resp.num_bytes_downloaded,
+            decoded_bytes=len(resp.content),
+        )
+
+    def _top_up(self) -> None:
+        """Start queued requests until the read-ahead window is full."""
+        while self._queued and len(self._pending) < self._window:
+            url, if_modified_since = self._queued.popleft()
+            if url not in self._pending:
+                self._pending[url] = (
+                    if_modified_since,
+                    self._submit(url, if_modified_since),
+                )
+
+    def _submit(self, url: str, if_modified_since: str | None) -> Future:
+        return asyncio.run_coroutine_threadsafe(
+            self._send(url, if_modified_since), self._loop,
+        )
+
+    async def _send(
+        self,
+        url: str,
+        if_modified_since: str | None,
+    ) -> "httpx.Response":
+        """GET *url* once; like ``request_with_retry(..., attempts=1)``."""
+        validate_url(url)
+        tracker = latency_tracker(url)
+        async with self._streams:
+            timeout = tracker.timeout(url)
+            started = time.monotonic()
+            try:
+                resp = await self.client.get(
+                    url,
+                    headers=request_headers(if_modified_since),
+                    timeout=timeout,
+                )
+            except httpx.TimeoutException:
+                tracker.record_timeout(timeout, url)
+                raise
+        tracker.record(time.monotonic() - started, url)
+        if resp.status_code != 304:
+            resp.raise_for_status()
+        return resp
+
+    def close(self) -> None:
+        """Drop unused prefetches, close the client and stop the loop."""
+        if self._loop.is_closed():
+            return
+        self._queued.clear()
+        self._pending.clear()
+
+        async def shutdown() -> None:
+            tasks = asyncio.all_tasks() - {asyncio.current_task()}
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.client.aclose()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "Http2Fetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
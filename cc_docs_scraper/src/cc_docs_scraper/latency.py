@@ -0,0 +1,170 @@
+"""Latency tracking, adaptive timeouts, and hedged requests.
+
+A :class:`LatencyTracker` keeps a rolling window of response times for
+one host and derives a per-request timeout from it, so a stalled
+connection is abandoned after a few multiples of the usual latency
+instead of the fixed ``REQUEST_TIMEOUT``.  :func:`hedged_request` sends
+a duplicate of a slow idempotent request once the first has taken
+longer than the observed p95 and returns whichever answers first; a
+:class:`HedgeBudget` caps how many duplicates are sent.
+"""
+
+import logging
+import math
+import threading
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Callable
+
+import requests
+
+from .constants import (
+    HEDGE_RATIO,
+    LATENCY_MIN_SAMPLES,
+    LATENCY_TIMEOUT_FACTOR,
+    LATENCY_WINDOW,
+    MIN_REQUEST_TIMEOUT,
+    REQUEST_TIMEOUT,
+)
+
+log = logging.getLogger("cc_docs_scraper")
+
+
+class LatencyTracker:
+    """Rolling window of response times (seconds) for one host.
+
+    Requests that time out are recorded at the timeout they were given,
+    so a host that slows down pushes the estimate (and with it the next
+    timeout) up instead of starving the window of samples.  Each
+    consecutive timeout of the same request *key* (its URL) also
+    doubles that request's next timeout, so a slow but healthy page can
+    still succeed on a retry.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._timeouts: dict[str, int] = {}  # key -> consecutive timeouts
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float, key: str | None = None) -> None:
+        """Add one observed response time (for request *key*)."""
+        with self._lock:
+            self._samples.append(seconds)
+            self._timeouts.pop(key, None)
+
+    def record_timeout(self, seconds: float, key: str | None = None) -> None:
+        """Note that request *key* timed out after *seconds*."""
+        with self._lock:
+            self._samples.append(seconds)
+            if key is not None:
+                self._timeouts[key] = self._timeouts.get(key, 0) + 1
+
+    def percentile(self, q: float) -> float | None:
+        """Return the *q*-th percentile (0–100), or ``None`` if empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(math.ceil(q / 100 * len(samples)), 1)
+        return samples[rank - 1]
+
+    def hedge_delay(self) -> float | None:
+        """Return the p95 once enough samples exist, else ``None``."""
+        if len(self) < LATENCY_MIN_SAMPLES:
+            return None
+        return self.percentile(95)
+
+    def timeout(self, key: str | None = None) -> float:
+        """Return the timeout to use for the next request (for *key*).
+
+        A multiple of the observed p95, clamped to
+        ``[MIN_REQUEST_TIMEOUT, REQUEST_TIMEOUT]``; ``REQUEST_TIMEOUT``
+        until enough samples exist.  Doubled for every consecutive
+        timeout of *key*, up to ``REQUEST_TIMEOUT``.
+        """
+        p95 = self.hedge_delay()
+        if p95 is None:
+            return REQUEST_TIMEOUT
+        with self._lock:
+            strikes = self._timeouts.get(key, 0) if key is not None else 0
+        base = max(p95 * LATENCY_TIMEOUT_FACTOR, MIN_REQUEST_TIMEOUT)
+        return min(base * 2 ** strikes, REQUEST_TIMEOUT)
+
+
+class HedgeBudget:
+    """Caps hedged duplicates at *ratio* of all requests sent."""
+
+    def __init__(self, ratio: float = HEDGE_RATIO) -> None:
+        self.ratio = ratio
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """Reserve one hedge if the budget allows it."""
+        with self._lock:
+            if self.hedges + 1 > self.ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+
+def _discard(future: Future) -> None:
+    """Close the losing response so its connection is released."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def hedged_request(
+    send: Callable[[], requests.Response],
+    *,
+    delay: float | None,
+    budget: HedgeBudget,
+) -> requests.Response:
+    """Call *send*, hedging with a second call if it is slow.
+
+    *send* must be idempotent.  When the first call has not returned
+    after *delay* seconds and *budget* allows it, a duplicate is sent
+    and the first response to arrive wins; if one call fails, the
+    other's outcome is used.  The loser is closed when it completes
+    (an in-flight ``requests`` call cannot be aborted).  With *delay*
+    ``None`` this is a plain ``send()``.
+    """
+    budget.count_request()
+    if delay is None:
+        return send()
+
+    pool = ThreadPoolExecutor(
+        max_workers=2, thread_name_prefix="cc-docs-hedge",
+    )
+    try:
+        first = pool.submit(send)
+        done, _ = wait([first], timeout=delay)
+        if done or not budget.try_spend():
+            return first.result()
+
+        log.debug("  hedging after %.2fs", delay)
+        second = pool.submit(send)
+        done, pending = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = next((f for f in done if f.exception() is None), None)
+        if winner is None:
+            # The call that finished failed: wait for the other one
+            winner = pending.pop() if pending else done.pop()
+            winner.exception()
+        loser = second if winner is first else first
+        loser.add_done_callback(_discard)
+        return winner.result()
+    finally:
+        pool.shutdown(wait=False)
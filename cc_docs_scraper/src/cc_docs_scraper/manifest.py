@@ -1,9 +1,17 @@
-"""Manifest persistence (load/save)."""
+"""Manifest persistence (load/save) and locking."""
 
 import json
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 
 from .constants import MANIFEST_FILE, OUTPUT_DIR
+from .writer import atomic_write_text
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
 
 
 def load_manifest(manifest_file: Path = MANIFEST_FILE) -> dict:
@@ -18,8 +26,30 @@ def save_manifest(
     manifest_file: Path = MANIFEST_FILE,
     output_dir: Path = OUTPUT_DIR,
 ) -> None:
-    """Write the manifest to disk."""
+    """Write the manifest to disk atomically (temp file + rename)."""
     output_dir.mkdir(parents=True, exist_ok=True)
-    manifest_file.write_text(
-        json.dumps(manifest, indent=2, sort_keys=True) + "\n", "utf-8"
+    atomic_write_text(
+        manifest_file, json.dumps(manifest, indent=2, sort_keys=True) + "\n",
     )
+
+
+@contextmanager
+def manifest_lock(manifest_file: Path = MANIFEST_FILE) -> Iterator[None]:
+    """Hold an exclusive advisory lock on *manifest_file*.
+
+    The lock lives in a sibling ``.lock`` file so it survives the
+    manifest being rewritten.  Blocks until the lock is free.  On
+    platforms without ``fcntl`` this is a no-op.
+    """
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+
+    lock_file = manifest_file.with_suffix(".lock")
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
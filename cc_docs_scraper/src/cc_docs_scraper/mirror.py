@@ -0,0 +1,190 @@
+"""Embeddable Python API for keeping a local docs mirror up to date.
+
+Example::
+
+    with Mirror("docs") as mirror:
+        for page in mirror.iter_refresh():
+            if page.status in ("new", "updated"):
+                handle(page.path)
+
+A :class:`Mirror` keeps one HTTP session and the manifest in memory, so
+repeated refreshes reuse warm connections.  Errors are raised
+(:class:`MirrorError`, :class:`ThresholdError`) rather than exiting.
+"""
+
+import asyncio
+import functools
+import logging
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+import requests
+
+from .constants import CHUNK_INDEX_FILE, MANIFEST_FILE, OUTPUT_DIR, REPORT_DIR
+from .http import fetch_markdown
+from .manifest import load_manifest
+from .normalize import DEFAULT_NORMALIZERS
+from .orchestrator import (
+    MirrorError,
+    PageResult,
+    ThresholdError,
+    check_thresholds,
+    discover_urls,
+    iter_fetch,
+    new_stats,
+)
+from .sitemap import sitemap_candidates
+from .urls import normalize_url
+
+log = logging.getLogger("cc_docs_scraper")
+
+__all__ = ["Mirror", "MirrorError", "PageResult", "ThresholdError"]
+
+
+class Mirror:
+    """A local docs mirror rooted at *output_dir*.
+
+    The manifest, change reports, and chunk index live at their usual
+    places inside *output_dir*.  Pass *session* to share an existing
+    ``requests.Session``; otherwise the mirror creates one and closes
+    it in :meth:`close`.  *rate_limit* keeps the polite delay between
+    downloads.  *normalizers* selects the volatile-content
+    normalizers used for change detection.  With *sitemap*, refreshes
+    only revalidate pages whose sitemap ``<lastmod>`` is newer than the
+    stored copy (see :mod:`cc_docs_scraper.sitemap`).
+    """
+
+    def __init__(
+        self,
+        output_dir: Path | str = OUTPUT_DIR,
+        *,
+        session: requests.Session | None = None,
+        rate_limit: bool = True,
+        normalizers: tuple[str, ...] = DEFAULT_NORMALIZERS,
+        sitemap: bool = False,
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.manifest_file = self.output_dir / MANIFEST_FILE.name
+        self.report_dir = self.output_dir / REPORT_DIR.name
+        self.chunk_index_file = self.output_dir / CHUNK_INDEX_FILE.name
+        self.rate_limit = rate_limit
+        self.normalizers = normalizers
+        self.sitemap = sitemap
+        self._owns_session = session is None
+        self.session = session or requests.Session()
+        self.manifest = load_manifest(self.manifest_file)
+        self.stats = new_stats()
+
+    def iter_refresh(
+        self,
+        *,
+        verify_only: bool = False,
+        force: bool = False,
+    ) -> Iterator[PageResult]:
+        """Check the doc index and yield a result per page as it completes.
+
+        Raises :class:`MirrorError` / :class:`ThresholdError` before the
+        first result if the index cannot be used, and
+        :class:`ThresholdError` after the last one if most pages failed
+        (see :func:`~cc_docs_scraper.orchestrator.check_thresholds`;
+        skipped with *force*).  Stopping early commits the pages
+        processed so far.  Counts for the run are in :attr:`stats` once
+        the iterator is closed or exhausted.
+        """
+        index_urls = discover_urls(
+            self.manifest, verify_only=verify_only, force=force,
+            output_dir=self.output_dir, session=self.session,
+        )
+        urls = index_urls
+        if self.sitemap:
+            urls = sitemap_candidates(
+                urls, self.manifest,
+                verify_only=verify_only, force=force, session=self.session,
+            )
+        pages = self.iter_fetch(urls, verify_only=verify_only, force=force)
+        if force:
+            return pages
+        return self._checked(pages, len(index_urls))
+
+    def _checked(
+        self,
+        pages: Iterator[PageResult],
+        index_url_count: int,
+    ) -> Iterator[PageResult]:
+        """Yield *pages*, then run the post-fetch threshold check."""
+        yield from pages
+        if not check_thresholds(self.stats, self.manifest, index_url_count):
+            raise ThresholdError(
+                "THRESHOLD: refresh failed the post-fetch check (see log). "
+                "Use force=True to override."
+            )
+
+    def iter_fetch(
+        self,
+        urls: list[str],
+        *,
+        verify_only: bool = False,
+        force: bool = False,
+    ) -> Iterator[PageResult]:
+        """Fetch just *urls* (old-style URLs are normalized)."""
+        self.stats = new_stats()
+        return iter_fetch(
+            [normalize_url(url) for url in urls], self.manifest,
+            verify_only=verify_only, force=force,
+            fetch_fn=functools.partial(fetch_markdown, session=self.session),
+            output_dir=self.output_dir,
+            manifest_file=self.manifest_file,
+            report_dir=self.report_dir,
+            chunk_index_file=self.chunk_index_file,
+            rate_limit=self.rate_limit,
+            normalizers=self.normalizers,
+            stats=self.stats,
+        )
+
+    def refresh(
+        self,
+        *,
+        verify_only: bool = False,
+        force: bool = False,
+    ) -> dict[str, int]:
+        """Run a full refresh and return its stats.
+
+        Raises like :meth:`iter_refresh`.
+        """
+        for _ in self.iter_refresh(verify_only=verify_only, force=force):
+            pass
+        return self.stats
+
+    async def aiter_refresh(
+        self,
+        *,
+        verify_only: bool = False,
+        force: bool = False,
+    ) -> AsyncIterator[PageResult]:
+        """Async variant of :meth:`iter_refresh`.
+
+        The blocking work runs in a worker thread, one page at a time,
+        so the event loop stays responsive.
+        """
+        pages = await asyncio.to_thread(
+            self.iter_refresh, verify_only=verify_only, force=force,
+        )
+        try:
+            while True:
+                page = await asyncio.to_thread(next, pages, None)
+                if page is None:
+                    return
+                yield page
+        finally:
+            await asyncio.to_thread(pages.close)
+
+    def close(self) -> None:
+        """Close the HTTP session if this mirror created it."""
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "Mirror":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,139 @@
+"""Normalization of volatile content for change detection.
+
+Pages can carry content that changes on every deploy without changing
+what the page says: build IDs, generated timestamps, tracking
+parameters in links, whitespace churn.  Each named normalizer rewrites
+one kind of volatile content to a stable form; the semantic hash of
+the normalized text decides whether a page really changed.  Files on
+disk always keep the raw content.
+
+Normalization is opt-in (:data:`DEFAULT_NORMALIZERS` is empty): a
+masked change is never written to the mirror.  The ``timestamps`` and
+``whitespace`` normalizers leave fenced code blocks alone, and
+``whitespace`` keeps markdown hard line breaks.
+"""
+
+import re
+from typing import Callable, Iterable, Iterator
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .content import compute_hash
+
+_BUILD_ID_RE = re.compile(
+    r"(?i)\b(build[-_ ]?(?:id|hash|sha)\b\"?\s*[:=]?\s*\"?"
+    r"|build\"?\s*[:=]\s*\"?)"
+    r"([0-9a-f]{7,}|[\w-]*\d[\w-]{5,})"
+)
+_TIMESTAMP_RE = re.compile(
+    r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?"
+    r"(?:Z|[+-]\d{2}:?\d{2})?"
+)
+_URL_RE = re.compile(r"https?://[^\s)<>\]\"']+")
+_TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga"}
+_FENCE_RE = re.compile(r" {0,3}(`{3,}|~{3,})")
+
+
+def _fenced_lines(text: str) -> Iterator[tuple[str, bool]]:
+    """Yield ``(line, in_code)``; fence lines count as code."""
+    fence = None
+    for line in text.split("\n"):
+        if fence is None:
+            match = _FENCE_RE.match(line)
+            if match:
+                fence = match.group(1)
+            yield line, fence is not None
+            continue
+        yield line, True
+        closing = line.strip()
+        if closing.startswith(fence) and closing == fence[0] * len(closing):
+            fence = None
+
+
+def _normalize_build_ids(text: str) -> str:
+    return _BUILD_ID_RE.sub(r"\1<build-id>", text)
+
+
+def _normalize_timestamps(text: str) -> str:
+    return "\n".join(
+        line if in_code else _TIMESTAMP_RE.sub("<timestamp>", line)
+        for line, in_code in _fenced_lines(text)
+    )
+
+
+def _is_tracking_param(name: str) -> bool:
+    return name.startswith("utm_") or name in _TRACKING_PARAMS
+
+
+def _strip_tracking(match: re.Match) -> str:
+    url = match.group(0)
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name.lower())
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _normalize_tracking_params(text: str) -> str:
+    return _URL_RE.sub(_strip_tracking, text)
+
+
+def _normalize_whitespace(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines: list[str] = []
+    after_blank = False
+    for line, in_code in _fenced_lines(text):
+        if not in_code:
+            # Two or more trailing spaces are a hard line break
+            hard_break = line.strip() and line.endswith("  ")
+            line = line.rstrip() + ("  " if hard_break else "")
+            if not line and after_blank:
+                continue
+        after_blank = not in_code and not line
+        lines.append(line)
+    return "\n".join(lines).strip("\n") + "\n"
+
+
+NORMALIZERS: dict[str, Callable[[str], str]] = {
+    "build-id": _normalize_build_ids,
+    "timestamps": _normalize_timestamps,
+    "tracking-params": _normalize_tracking_params,
+    "whitespace": _normalize_whitespace,
+}
+
+DEFAULT_NORMALIZERS: tuple[str, ...] = ()
+
+
+def parse_normalizers(spec: str) -> tuple[str, ...]:
+    """Parse a comma-separated list of normalizer names.
+
+    ``none`` (or an empty string) disables normalization.
+    """
+    names = tuple(name.strip() for name in spec.split(",") if name.strip())
+    if names in ((), ("none",)):
+        return ()
+    unknown = [name for name in names if name not in NORMALIZERS]
+    if unknown:
+        raise ValueError(
+            f"Unknown normalizer(s) {', '.join(unknown)} "
+            f"(expected any of {', '.join(NORMALIZERS)}, or none)"
+        )
+    return names
+
+
+def normalize(content: str, names: Iterable[str] = DEFAULT_NORMALIZERS) -> str:
+    """Apply the normalizers *names* to *content*, in order."""
+    for name in names:
+        content = NORMALIZERS[name](content)
+    return content
+
+
+def semantic_hash(
+    content: str,
+    names: Iterable[str] = DEFAULT_NORMALIZERS,
+) -> str:
+    """Return the SHA-256 of *content* after normalization."""
+    return compute_hash(normalize(content, names))
@@ -1,106 +1,416 @@
-"""Fetch orchestration, stale file removal, and threshold checks."""
+"""Fetch orchestration, URL discovery, stale file removal, and thresholds."""
 
+import heapq
+import itertools
 import logging
 import random
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterator
 
-from .constants import MANIFEST_FILE, OUTPUT_DIR
+import requests
+
+from .chunks import page_chunks, update_chunk_index
+from .constants import MANIFEST_FILE, MAX_RETRIES, OUTPUT_DIR, TIMESTAMP_FORMAT
 from .content import compute_hash
-from .http import fetch_markdown
+from .diff import page_change_report
+from .http import (
+    FetchResult,
+    fetch_doc_index,
+    fetch_markdown,
+    is_fresh,
+    retry_delay,
+)
 from .manifest import save_manifest
+from .normalize import DEFAULT_NORMALIZERS, normalize, semantic_hash
+from .report import write_change_report, write_chunk_changes
+from .shards import filter_shard_urls
 from .urls import url_to_filepath
+from .writer import DiskWriter
 
 log = logging.getLogger("cc_docs_scraper")
 
-# Type alias for the fetch function signature
-FetchFn = Callable[
-    [str, str | None],
-    tuple[str | None, str | None, bool],
-]
+# Type alias for the fetch function signature.  A plain
+# ``(content, last_modified, not_modified)`` tuple is also accepted.
+FetchFn = Callable[[str, str | None], FetchResult]
 
 
-def run_fetch(
-    urls: list[str],
-    manifest: dict,
-    *,
-    verify_only: bool = False,
-    force: bool = False,
-    fetch_fn: FetchFn = fetch_markdown,
-    output_dir: Path = OUTPUT_DIR,
-    manifest_file: Path = MANIFEST_FILE,
-) -> dict[str, int]:
-    """Fetch markdown for each URL, update files & manifest.
+@dataclass(frozen=True)
+class PageResult:
+    """Outcome for one page, yielded by :func:`iter_fetch`.
 
-    Returns the stats dict with counts for each outcome.
+    *status* is one of the stats keys (``new``, ``updated``,
+    ``unchanged``, ``not_modified``, ``fresh``, ``failed``).  *sha256*
+    is the page's current hash (``None`` if unknown), *bytes* the size
+    of the downloaded body (0 when nothing was downloaded),
+    *wire_bytes* the bytes received on the wire for it (compressed, so
+    usually fewer), and *latency* the seconds spent fetching (0 for
+    fresh pages).
     """
-    files = manifest.setdefault("files", {})
 
-    stats = {
+    url: str
+    path: Path
+    status: str
+    sha256: str | None = None
+    bytes: int = 0
+    latency: float = 0.0
+    wire_bytes: int = 0
+
+
+def new_stats() -> dict[str, int]:
+    """Return a zeroed stats dict."""
+    return {
         "new": 0,
         "updated": 0,
         "unchanged": 0,
         "not_modified": 0,
+        "fresh": 0,
         "failed": 0,
+        "wire_bytes": 0,
+        "decoded_bytes": 0,
     }
 
-    for i, url in enumerate(urls, 1):
-        filepath = url_to_filepath(url, output_dir=output_dir)
-        rel_key = str(filepath)
-        existing = files.get(rel_key, {})
 
-        # Use stored Last-Modified for conditional request (skip on force)
-        ims = None if force else existing.get("last_modified")
+class _RetryQueue:
+    """Failed pages waiting for their not-before time (a min-heap)."""
 
-        log.info("[%d/%d] %s", i, len(urls), url)
-        content, last_modified, not_modified = fetch_fn(
-            url, ims,
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, tuple[int, str, int]]] = []
+        self._seq = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def push(self, delay: float, item: tuple[int, str, int]) -> None:
+        """Queue *item* to be retried in *delay* seconds."""
+        heapq.heappush(
+            self._heap, (time.monotonic() + delay, next(self._seq), item),
         )
 
-        if not_modified:
-            stats["not_modified"] += 1
-            log.debug("  not modified (304)")
-            continue
+    def pop_due(self) -> tuple[int, str, int] | None:
+        """Return the next item whose time has come, if any."""
+        if self._heap and self._heap[0][0] <= time.monotonic():
+            return heapq.heappop(self._heap)[2]
+        return None
 
-        if content is None:
-            stats["failed"] += 1
-            continue
+    def pop_next(self) -> tuple[int, str, int]:
+        """Wait for the earliest item and return it."""
+        not_before = self._heap[0][0]
+        time.sleep(max(not_before - time.monotonic(), 0))
+        return heapq.heappop(self._heap)[2]
 
-        content_hash = compute_hash(content)
-        prev_hash = existing.get("sha256")
 
-        if prev_hash == content_hash:
-            # Content identical despite 200 — update last_modified timestamp
-            stats["unchanged"] += 1
-            if last_modified and not verify_only:
-                existing["last_modified"] = last_modified
-            log.debug("  unchanged (hash match)")
-            continue
+def _schedule(
+    urls: list[str],
+    retries: _RetryQueue,
+) -> Iterator[tuple[int, str, int]]:
+    """Yield ``(index, url, attempt)``, slotting in retries as they fall due.
 
-        if verify_only:
-            status = "would update" if prev_hash else "would create"
-            log.info("  %s  %s", status, filepath)
-            stats["updated" if prev_hash else "new"] += 1
+    Retries that are not due yet wait until the URL list is exhausted.
+    """
+    for i, url in enumerate(urls, 1):
+        while (item := retries.pop_due()) is not None:
+            yield item
+        yield i, url, 1
+    while retries:
+        yield retries.pop_next()
+
+
+def _conditional_requests(
+    urls: list[str],
+    files: dict,
+    *,
+    force: bool,
+    output_dir: Path,
+) -> list[tuple[str, str | None]]:
+    """Return ``(url, If-Modified-Since)`` for the pages needing a request.
+
+    Mirrors the per-page checks in :func:`iter_fetch`: pages still
+    fresh are left out, and *force* drops the conditional header.
+    """
+    pages = []
+    for url in urls:
+        filepath = url_to_filepath(url, output_dir=output_dir)
+        existing = files.get(str(filepath), {})
+        if not force and is_fresh(existing.get("fresh_until")):
             continue
+        pages.append((url, None if force else existing.get("last_modified")))
+    return pages
+
+
+def iter_fetch(
+    urls: list[str],
+    manifest: dict,
+    *,
+    verify_only: bool = False,
+    force: bool = False,
+    fetch_fn: FetchFn = fetch_markdown,
+    output_dir: Path = OUTPUT_DIR,
+    manifest_file: Path = MANIFEST_FILE,
+    report_dir: Path | None = None,
+    chunk_index_file: Path | None = None,
+    rate_limit: bool = True,
+    normalizers: tuple[str, ...] = DEFAULT_NORMALIZERS,
+    stats: dict[str, int] | None = None,
+) -> Iterator[PageResult]:
+    """Fetch markdown for each URL, yielding a :class:`PageResult` each.
+
+    Pages whose stored ``fresh_until`` deadline has not passed are
+    skipped without any request and counted as ``fresh`` (skip on
+    force).  When *report_dir* is given, a per-page change report for
+    new and changed pages is written there (also in verify mode).
+    *rate_limit* controls the random delay after each download.
+
+    When *chunk_index_file* is given, every written page is split into
+    heading-delimited chunks and the chunk index is updated (not in
+    verify mode); the added, changed and removed chunk IDs go to
+    ``chunk-changes.json`` in *report_dir*.
+
+    Change detection also compares ``semantic_sha256``, the hash of the
+    page after the *normalizers* (see :mod:`cc_docs_scraper.normalize`)
+    have masked volatile content.  A page that differs only in volatile
+    content counts as ``unchanged``: it is not rewritten, reported, or
+    re-chunked.  Chunk hashes are taken over the normalized text.
+
+    A page whose fetch fails with a retryable error goes onto a deferred
+    retry queue with a back-off deadline instead of stalling the run;
+    it is retried once due (or after the last URL), up to
+    ``MAX_RETRIES`` attempts in total, and only then counted as
+    ``failed``.
+
+    Page files are handed to a :class:`DiskWriter` so disk I/O overlaps
+    with fetching, so a ``new``/``updated`` result means the page is
+    queued; it is durable once iteration ends.  The manifest is only
+    saved after every queued page is written, and a page that could
+    not be written keeps its previous manifest entry and is yielded a
+    second time as ``failed``.  Stopping early (closing the generator)
+    still commits the pages processed so far.
+
+    If *fetch_fn* has a ``prefetch`` method (see
+    :class:`~cc_docs_scraper.http2.Http2Fetcher`), it is first handed
+    every ``(url, If-Modified-Since)`` pair that will be requested, so
+    the transport can issue them concurrently; pages are still
+    processed (and retried) in order.
+
+    *stats*, if given, is updated with the count for each outcome.
+    """
+    files = manifest.setdefault("files", {})
+    stats = new_stats() if stats is None else stats
+    changes: list[dict] = []
+    writer = None if verify_only else DiskWriter()
+    # rel_key -> (previous manifest entry, stats key) for queued writes
+    pending: dict[str, tuple[dict | None, str]] = {}
+    # rel_key -> (url, chunk hashes) for queued writes
+    chunked: dict[str, tuple[str, dict[str, str]]] = {}
+    retries = _RetryQueue()
+
+    prefetch = getattr(fetch_fn, "prefetch", None)
+    if prefetch is not None:
+        prefetch(_conditional_requests(
+            urls, files, force=force, output_dir=output_dir,
+        ))
+
+    try:
+        for i, url, attempt in _schedule(urls, retries):
+            filepath = url_to_filepath(url, output_dir=output_dir)
+            rel_key = str(filepath)
+            existing = files.get(rel_key, {})
+            prev_hash = existing.get("sha256")
+
+            # Use stored Last-Modified for conditional request (skip on force)
+            ims = None if force else existing.get("last_modified")
+
+            if attempt == 1:
+                log.info("[%d/%d] %s", i, len(urls), url)
+            else:
+                log.info("[%d/%d] %s (attempt %d)", i, len(urls), url, attempt)
+
+            # Server said the stored copy is still fresh — no request at all
+            if not force and is_fresh(existing.get("fresh_until")):
+                stats["fresh"] += 1
+                log.debug("  fresh until %s", existing["fresh_until"])
+                yield PageResult(url, filepath, "fresh", prev_hash)
+                continue
+
+            started = time.monotonic()
+            result = FetchResult(*fetch_fn(url, ims))
+            latency = time.monotonic() - started
+            stats["wire_bytes"] += result.wire_bytes
+            stats["decoded_bytes"] += result.decoded_bytes
+            if result.retryable and attempt < MAX_RETRIES:
+                delay = retry_delay(attempt)
+                log.warning(
+                    "  attempt %d failed, retrying in %.1fs", attempt, delay,
+                )
+                retries.push(delay, (i, url, attempt + 1))
+                continue
+
+            content = result.content
+            last_modified = result.last_modified
+
+            if result.not_modified:
+                stats["not_modified"] += 1
+                if existing and not verify_only:
+                    existing["fresh_until"] = result.fresh_until
+                    if result.etag:
+                        existing["etag"] = result.etag
+                log.debug("  not modified (304)")
+                yield PageResult(
+                    url, filepath, "not_modified", prev_hash, 0, latency,
+                    result.wire_bytes,
+                )
+                continue
+
+            if content is None:
+                if result.changed and verify_only:
+                    # HEAD probe: metadata differs, body was never downloaded
+                    log.info("  would update  %s (metadata changed)", filepath)
+                    status = "updated"
+                    changes.append(
+                        {"url": url, "path": rel_key, "status": "updated"}
+                    )
+                else:
+                    status = "failed"
+                    if result.retryable:
+                        log.error("  failed after %d attempt(s)", attempt)
+                stats[status] += 1
+                yield PageResult(
+                    url, filepath, status, prev_hash, 0, latency,
+                    result.wire_bytes,
+                )
+                continue
+
+            content_hash = compute_hash(content)
+            semantic = semantic_hash(content, normalizers)
+            # Body length as served (what Content-Length describes); only
+            # re-encode for fetchers that don't report it
+            size = result.decoded_bytes or len(content.encode("utf-8"))
+            volatile_only = (
+                prev_hash != content_hash
+                and existing.get("semantic_sha256") == semantic
+            )
+
+            if prev_hash == content_hash or volatile_only:
+                # Identical (or only volatile content differs) despite
+                # 200 — keep the file and refresh the validators; size
+                # follows the served body so HEAD probes compare like
+                # with like (sha256 keeps describing the file on disk)
+                stats["unchanged"] += 1
+                if not verify_only:
+                    if last_modified:
+                        existing["last_modified"] = last_modified
+                    existing["fresh_until"] = result.fresh_until
+                    existing["etag"] = result.etag
+                    existing["semantic_sha256"] = semantic
+                    existing["size"] = size
+                if volatile_only:
+                    log.debug("  unchanged (only volatile content differs)")
+                else:
+                    log.debug("  unchanged (hash match)")
+                yield PageResult(
+                    url, filepath, "unchanged", prev_hash, size, latency,
+                    result.wire_bytes,
+                )
+                continue
+
+            status = "updated" if prev_hash else "new"
+            if report_dir is not None:
+                old_content = (
+                    filepath.read_text("utf-8") if filepath.exists() else ""
+                )
+                changes.append({
+                    "url": url,
+                    "path": rel_key,
+                    "status": status,
+                    **page_change_report(old_content, content),
+                })
+
+            if verify_only:
+                verb = "would update" if prev_hash else "would create"
+                log.info("  %s  %s", verb, filepath)
+            else:
+                writer.submit(filepath, content)
+                pending[rel_key] = (files.get(rel_key), status)
+                if chunk_index_file is not None:
+                    page = filepath.relative_to(output_dir).as_posix()
+                    normalized = normalize(content, normalizers)
+                    chunked[rel_key] = (url, page_chunks(page, normalized))
+
+                files[rel_key] = {
+                    **existing,  # keep fields owned by other phases
+                    "url": url,
+                    "sha256": content_hash,
+                    "semantic_sha256": semantic,
+                    "last_modified": last_modified,
+                    "last_fetched": time.strftime(
+                        TIMESTAMP_FORMAT, time.gmtime()
+                    ),
+                    "fresh_until": result.fresh_until,
+                    "etag": result.etag,
+                    "size": size,
+                }
+                log.info("  queued %s", filepath)
+            stats[status] += 1
+            yield PageResult(
+                url, filepath, status, content_hash, size, latency,
+                result.wire_bytes,
+            )
+
+            # Rate-limit between requests (only on actual downloads)
+            if not verify_only and rate_limit and (i < len(urls) or retries):
+                time.sleep(random.uniform(0.5, 1.0))
+    finally:
+        failed_writes = _commit(
+            manifest, stats, changes, writer, pending, chunked,
+            verify_only=verify_only,
+            output_dir=output_dir,
+            manifest_file=manifest_file,
+            report_dir=report_dir,
+            chunk_index_file=chunk_index_file,
+            normalizers=normalizers,
+        )
 
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-        filepath.write_text(content, "utf-8")
+    for path, url in failed_writes:
+        yield PageResult(url, path, "failed")
 
-        files[rel_key] = {
-            "url": url,
-            "sha256": content_hash,
-            "last_modified": last_modified,
-            "last_fetched": time.strftime(
-                "%Y-%m-%dT%H:%M:%SZ", time.gmtime()
-            ),
-        }
-        stats["updated" if prev_hash else "new"] += 1
-        log.info("  wrote %s", filepath)
 
-        # Rate-limit between requests (only on actual downloads)
-        if i < len(urls):
-            time.sleep(random.uniform(0.5, 1.0))
+def _commit(
+    manifest: dict,
+    stats: dict[str, int],
+    changes: list[dict],
+    writer: DiskWriter | None,
+    pending: dict[str, tuple[dict | None, str]],
+    chunked: dict[str, tuple[str, dict[str, str]]],
+    *,
+    verify_only: bool,
+    output_dir: Path,
+    manifest_file: Path,
+    report_dir: Path | None,
+    chunk_index_file: Path | None,
+    normalizers: tuple[str, ...],
+) -> list[tuple[Path, str]]:
+    """Finish a fetch run: flush writes, save manifest, write reports.
+
+    Returns ``(path, url)`` for every page whose write failed.
+    """
+    files = manifest["files"]
+    failed: list[tuple[Path, str]] = []
+
+    # Wait for the disk stage before committing the manifest
+    failed_writes = writer.close() if writer else {}
+    for path, exc in failed_writes.items():
+        rel_key = str(path)
+        previous, status = pending[rel_key]
+        failed.append((path, files[rel_key]["url"]))
+        chunked.pop(rel_key, None)
+        log.error("Failed to write %s: %s", path, exc)
+        if previous is None:
+            del files[rel_key]
+        else:
+            files[rel_key] = previous
+        stats[status] -= 1
+        stats["failed"] += 1
 
     if not verify_only:
         save_manifest(
@@ -109,16 +419,140 @@ def run_fetch(
             output_dir=output_dir,
         )
 
+    decoded = stats["decoded_bytes"]
+    saved = 1 - stats["wire_bytes"] / decoded if decoded else 0.0
     log.info(
         "Done — new: %d, updated: %d, unchanged: %d, "
-        "not_modified: %d, failed: %d",
+        "not_modified: %d, fresh: %d, failed: %d; "
+        "%d bytes on the wire for %d decoded (%.0f%% saved)",
         stats["new"], stats["updated"], stats["unchanged"],
-        stats["not_modified"], stats["failed"],
+        stats["not_modified"], stats["fresh"], stats["failed"],
+        stats["wire_bytes"], decoded, saved * 100,
     )
 
+    if report_dir is not None:
+        write_change_report(
+            changes, stats, verify_only=verify_only, report_dir=report_dir,
+        )
+
+    if chunk_index_file is not None and not verify_only:
+        delta = update_chunk_index(
+            chunked, manifest,
+            output_dir=output_dir, index_file=chunk_index_file,
+            normalizers=normalizers,
+        )
+        if report_dir is not None:
+            write_chunk_changes(delta, report_dir=report_dir)
+
+    return failed
+
+
+def run_fetch(
+    urls: list[str],
+    manifest: dict,
+    **kwargs,
+) -> dict[str, int]:
+    """Run :func:`iter_fetch` to completion and return the stats dict.
+
+    Accepts the same keyword arguments as :func:`iter_fetch`.
+    """
+    stats = new_stats()
+    for _ in iter_fetch(urls, manifest, stats=stats, **kwargs):
+        pass
     return stats
 
 
+class MirrorError(Exception):
+    """The mirror cannot be updated (e.g. the doc index is empty)."""
+
+
+class ThresholdError(MirrorError):
+    """A safety threshold tripped; the local mirror was left alone."""
+
+
+def discover_urls(
+    manifest: dict,
+    *,
+    verify_only: bool = False,
+    force: bool = False,
+    shard: tuple[int, int] | None = None,
+    output_dir: Path = OUTPUT_DIR,
+    session: requests.Session | None = None,
+) -> list[str]:
+    """Return the page URLs to check, refreshing the doc index first.
+
+    Skips the index request while ``index_fresh_until`` holds and
+    falls back to the manifest's URLs when the index is unchanged.  A
+    changed index prunes pages that left it (see
+    :func:`remove_stale_files`).  With *shard*, only URLs owned by that
+    ``(I, N)`` shard are returned.
+
+    Raises :class:`MirrorError` when there are no URLs at all and
+    :class:`ThresholdError` when the index lost over half the known
+    pages (skipped with *force*).
+    """
+    stored_index_lm = None if force else manifest.get("index_last_modified")
+    stored_index_fresh = manifest.get("index_fresh_until")
+    if not force and is_fresh(stored_index_fresh):
+        log.info("Doc index still fresh until %s", stored_index_fresh)
+        index_urls, new_index_lm = None, stored_index_lm
+        index_fresh_until = stored_index_fresh
+    else:
+        index_urls, new_index_lm, index_fresh_until = fetch_doc_index(
+            last_modified=stored_index_lm, session=session,
+        )
+
+    if index_urls is None:
+        # Index unchanged — but individual pages may still have changed.
+        # Rebuild URL list from manifest.
+        index_urls = sorted(
+            meta["url"]
+            for meta in manifest.get("files", {}).values()
+            if "url" in meta
+        )
+        if not index_urls and shard is None:
+            raise MirrorError("No doc URLs in index or manifest.")
+        log.info(
+            "Index unchanged; checking %d known pages for updates",
+            len(index_urls),
+        )
+        if not verify_only:
+            manifest["index_fresh_until"] = index_fresh_until
+        return index_urls
+
+    if not index_urls:
+        raise MirrorError("No doc URLs found in index.")
+    if shard is not None:
+        index_urls = filter_shard_urls(index_urls, *shard)
+
+    # Threshold: catch massive URL count drops before touching files
+    if not force:
+        prev_count = len(manifest.get("files", {}))
+        if prev_count > 0 and len(index_urls) < prev_count * 0.5:
+            raise ThresholdError(
+                f"THRESHOLD: index returned {len(index_urls)} URLs but "
+                f"manifest has {prev_count} files (>50% drop). Possible "
+                "site migration or index breakage. Aborting to protect "
+                "local mirror. Use --force to override."
+            )
+
+    # Detect removed pages
+    removed = remove_stale_files(
+        index_urls, manifest, verify_only=verify_only, output_dir=output_dir,
+    )
+    if removed:
+        log.info("Removed %d stale file(s)", removed)
+
+    # Store new index timestamp and freshness, now that the index passed
+    # the checks (a rejected index must not be trusted as fresh)
+    if not verify_only:
+        manifest["index_fresh_until"] = index_fresh_until
+        if new_index_lm:
+            manifest["index_last_modified"] = new_index_lm
+
+    return index_urls
+
+
 def remove_stale_files(
     current_urls: list[str],
     manifest: dict,
@@ -169,6 +603,7 @@ def check_thresholds(
     ok_count = (
         stats["new"] + stats["updated"]
         + stats["unchanged"] + stats["not_modified"]
+        + stats.get("fresh", 0)
     )
 
     # On the very first run there's nothing to compare against
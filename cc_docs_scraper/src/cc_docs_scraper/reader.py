@@ -0,0 +1,210 @@
+"""Read-only, in-process access to a local docs mirror.
+
+:class:`MirrorReader` resolves page slugs and URLs through a lookup
+table built once from the manifest and serves page bytes from
+memory-mapped files kept in a size-bounded LRU cache, so repeat reads
+of hot pages need no system calls.
+"""
+
+import logging
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from .constants import (
+    DOC_PREFIX,
+    MANIFEST_FILE,
+    OUTPUT_DIR,
+    READER_CACHE_BYTES,
+)
+from .manifest import load_manifest
+from .urls import normalize_url, url_to_filepath
+
+log = logging.getLogger("cc_docs_scraper")
+
+
+class PageRef(NamedTuple):
+    """Where a page lives and which version the manifest expects."""
+
+    path: Path
+    sha256: str | None
+
+
+class _Mapped(NamedTuple):
+    sha256: str | None
+    data: mmap.mmap | None  # None for empty files
+    size: int
+
+
+def page_slug(url: str) -> str:
+    """Return the slug for a doc URL (``…/docs/en/hooks.md`` → ``hooks``)."""
+    path = urlparse(url).path
+    if path.startswith(DOC_PREFIX):
+        path = path[len(DOC_PREFIX):]
+    return path.removesuffix(".md")
+
+
+class MirrorReader:
+    """Serve page contents from a mirror written by the scraper.
+
+    Pages are looked up by slug (``hooks``, ``sub/page``), file name
+    relative to *output_dir* (``hooks.md``), manifest key, or URL
+    (current or legacy form).  Page files are located from their URL
+    under *output_dir*, so the reader works from any working
+    directory; entries without a URL fall back to their manifest key,
+    taken relative to the directory containing *output_dir*.
+
+    Mapped files are cached until their combined size exceeds
+    *cache_bytes*, evicting the least recently used first; a page
+    larger than the whole cache is read without being cached.  Call
+    :meth:`refresh` after the scraper runs to pick up the new manifest;
+    only pages whose ``sha256`` changed are evicted.  Safe to share
+    between threads.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path | str = OUTPUT_DIR,
+        *,
+        cache_bytes: int = READER_CACHE_BYTES,
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.manifest_file = self.output_dir / MANIFEST_FILE.name
+        self.cache_bytes = cache_bytes
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[Path, _Mapped] = OrderedDict()
+        self._cached_bytes = 0
+        self._manifest_stat: tuple[int, int] | None = None
+        self._lookup: dict[str, PageRef] = {}
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len({ref.path for ref in self._lookup.values()})
+
+    def __contains__(self, name: str) -> bool:
+        return self._resolve(name) is not None
+
+    def resolve(self, name: str) -> PageRef:
+        """Return the :class:`PageRef` for *name*; ``KeyError`` if unknown."""
+        ref = self._resolve(name)
+        if ref is None:
+            raise KeyError(name)
+        return ref
+
+    def _resolve(self, name: str) -> PageRef | None:
+        ref = self._lookup.get(name)
+        if ref is None and "://" in name:
+            ref = self._lookup.get(normalize_url(name))
+        return ref
+
+    def read(self, name: str) -> bytes:
+        """Return the bytes of page *name* (see :meth:`resolve`)."""
+        ref = self.resolve(name)
+        with self._lock:
+            cached = self._cache.get(ref.path)
+            if cached is not None:
+                self._cache.move_to_end(ref.path)
+                return cached.data[:] if cached.data is not None else b""
+
+            mapped = self._map(ref)
+            if mapped.size > self.cache_bytes:
+                try:
+                    return mapped.data[:]
+                finally:
+                    mapped.data.close()
+            self._store(ref.path, mapped)
+            return mapped.data[:] if mapped.data is not None else b""
+
+    def read_text(self, name: str) -> str:
+        """Return page *name* decoded as UTF-8."""
+        return self.read(name).decode("utf-8")
+
+    def refresh(self) -> int:
+        """Reload the lookup table if the manifest changed on disk.
+
+        Evicts cached pages whose manifest ``sha256`` changed or that
+        left the manifest.  Returns the number of evicted pages.
+        """
+        try:
+            st = os.stat(self.manifest_file)
+            manifest_stat = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            manifest_stat = None
+        if manifest_stat is not None and manifest_stat == self._manifest_stat:
+            return 0
+
+        manifest = load_manifest(self.manifest_file)
+        lookup: dict[str, PageRef] = {}
+        for key, meta in manifest.get("files", {}).items():
+            ref = PageRef(self._page_path(key, meta), meta.get("sha256"))
+            lookup[key] = ref
+            if "url" in meta:
+                slug = page_slug(meta["url"])
+                lookup[meta["url"]] = ref
+                lookup[slug] = ref
+                lookup[f"{slug}.md"] = ref
+
+        with self._lock:
+            current = {ref.path: ref.sha256 for ref in lookup.values()}
+            stale = [
+                path for path, mapped in self._cache.items()
+                if path not in current or current[path] != mapped.sha256
+            ]
+            for path in stale:
+                self._evict(path)
+            self._lookup = lookup
+            self._manifest_stat = manifest_stat
+
+        if stale:
+            log.debug("Reader evicted %d changed page(s)", len(stale))
+        return len(stale)
+
+    def close(self) -> None:
+        """Unmap every cached page."""
+        with self._lock:
+            for path in list(self._cache):
+                self._evict(path)
+
+    def __enter__(self) -> "MirrorReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _page_path(self, key: str, meta: dict) -> Path:
+        """Locate the file for manifest entry *key* under output_dir."""
+        if "url" in meta:
+            try:
+                return url_to_filepath(meta["url"], output_dir=self.output_dir)
+            except ValueError:
+                pass
+        path = Path(key)
+        # Keys are written relative to the scraper's working directory,
+        # i.e. they start with the output directory's own name
+        return path if path.is_absolute() else self.output_dir.parent / path
+
+    def _map(self, ref: PageRef) -> _Mapped:
+        with open(ref.path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size == 0:  # mmap cannot map an empty file
+                return _Mapped(ref.sha256, None, 0)
+            data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return _Mapped(ref.sha256, data, size)
+
+    def _store(self, path: Path, mapped: _Mapped) -> None:
+        if path in self._cache:
+            self._evict(path)
+        self._cache[path] = mapped
+        self._cached_bytes += mapped.size
+        while self._cached_bytes > self.cache_bytes:
+            self._evict(next(iter(self._cache)))
+
+    def _evict(self, path: Path) -> None:
+        mapped = self._cache.pop(path)
+        self._cached_bytes -= mapped.size
+        if mapped.data is not None:
+            mapped.data.close()
@@ -0,0 +1,103 @@
+"""Per-run change reports (JSON and markdown)."""
+
+import json
+import logging
+import time
+from pathlib import Path
+
+from .constants import REPORT_DIR, TIMESTAMP_FORMAT
+from .writer import atomic_write_text
+
+log = logging.getLogger("cc_docs_scraper")
+
+
+def render_markdown(report: dict) -> str:
+    """Render a change *report* as a markdown document."""
+    mode = " (verify)" if report["verify_only"] else ""
+    stats = ", ".join(
+        f"{key}: {value}" for key, value in report["stats"].items()
+    )
+    lines = [
+        f"# Change report{mode}", "",
+        f"Generated {report['generated']}", "",
+        stats,
+    ]
+
+    if not report["pages"]:
+        lines += ["", "No pages changed."]
+
+    for page in report["pages"]:
+        lines += [
+            "", f"## {page['path']} ({page['status']})", "", page["url"],
+        ]
+        if "hunks" not in page:
+            lines += ["", "Metadata changed; body not downloaded."]
+            continue
+
+        lines += [
+            "",
+            f"+{page['lines_added']} / -{page['lines_removed']} lines",
+        ]
+        for kind in ("added", "removed", "modified"):
+            headings = page["sections"][kind]
+            if headings:
+                names = ", ".join(f"`{h or '(preamble)'}`" for h in headings)
+                lines.append(f"- Sections {kind}: {names}")
+        if page["hunks"]:
+            # Four backticks so fences inside the docs don't close it
+            lines += ["", "````diff", *page["hunks"], "````"]
+
+    return "\n".join(lines) + "\n"
+
+
+def write_change_report(
+    pages: list[dict],
+    stats: dict[str, int],
+    *,
+    verify_only: bool = False,
+    report_dir: Path = REPORT_DIR,
+) -> Path:
+    """Write ``changes.json`` and ``changes.md`` into *report_dir*.
+
+    *pages* holds one entry per new or changed page (see
+    :func:`cc_docs_scraper.diff.page_change_report`).  Both files are
+    replaced on every run.  Returns the JSON report path.
+    """
+    report = {
+        "generated": time.strftime(TIMESTAMP_FORMAT, time.gmtime()),
+        "verify_only": verify_only,
+        "stats": stats,
+        "pages": pages,
+    }
+
+    report_dir.mkdir(parents=True, exist_ok=True)
+    json_file = report_dir / "changes.json"
+    atomic_write_text(
+        json_file, json.dumps(report, indent=2, sort_keys=True) + "\n",
+    )
+    atomic_write_text(report_dir / "changes.md", render_markdown(report))
+    log.info("Change report written to %s", json_file)
+    return json_file
+
+
+def write_chunk_changes(
+    delta: dict[str, list[str]],
+    *,
+    report_dir: Path = REPORT_DIR,
+) -> Path:
+    """Write this run's chunk delta to ``chunk-changes.json``.
+
+    *delta* holds the ``added``, ``changed`` and ``removed`` chunk IDs
+    (see :func:`cc_docs_scraper.chunks.update_chunk_index`).  The file
+    is replaced on every run.
+    """
+    report = {
+        "generated": time.strftime(TIMESTAMP_FORMAT, time.gmtime()),
+        **delta,
+    }
+    report_dir.mkdir(parents=True, exist_ok=True)
+    json_file = report_dir / "chunk-changes.json"
+    atomic_write_text(
+        json_file, json.dumps(report, indent=2, sort_keys=True) + "\n",
+    )
+    return json_file
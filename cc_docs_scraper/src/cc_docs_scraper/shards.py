@@ -0,0 +1,188 @@
+"""Sharded runs: stable URL partitioning and manifest fragment merging."""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from .constants import MANIFEST_FILE, OUTPUT_DIR
+from .manifest import load_manifest, manifest_lock, save_manifest
+
+log = logging.getLogger("cc_docs_scraper")
+
+FRAGMENT_GLOB = "manifest.shard-*-of-*.json"
+
+# Keys that describe the fragment itself rather than the mirror
+_FRAGMENT_KEYS = {"files", "shard", "shard_count"}
+
+# Index-level times that legitimately differ between shards (each shard
+# fetched the index or swept at its own time); the earliest one wins.
+_EARLIEST_KEYS = {"index_fresh_until", "last_full_sweep"}
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse an ``I/N`` shard spec into ``(I, N)``.
+
+    Shards are numbered from 1, so ``1/4`` … ``4/4`` cover all URLs.
+    """
+    try:
+        index_str, count_str = spec.split("/")
+        index, count = int(index_str), int(count_str)
+    except ValueError:
+        raise ValueError(
+            f"Shard spec must look like I/N, got '{spec}'"
+        ) from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(
+            f"Shard index must be between 1 and {count}, got '{spec}'"
+        )
+    return index, count
+
+
+def shard_for_url(url: str, shard_count: int) -> int:
+    """Return the 1-based shard that owns *url*.
+
+    Uses a SHA-256 prefix rather than ``hash()`` so the assignment is
+    identical across processes, hosts, and Python versions.
+    """
+    digest = hashlib.sha256(url.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count + 1
+
+
+def filter_shard_urls(
+    urls: list[str],
+    shard: int,
+    shard_count: int,
+) -> list[str]:
+    """Return the subset of *urls* owned by *shard*."""
+    return [url for url in urls if shard_for_url(url, shard_count) == shard]
+
+
+def manifest_owns(manifest: dict, url: str) -> bool:
+    """Return True if *url* belongs to *manifest* (always, unless sharded)."""
+    shard_count = manifest.get("shard_count")
+    if not shard_count:
+        return True
+    return shard_for_url(url, shard_count) == manifest["shard"]
+
+
+def shard_manifest(manifest: dict, shard: int, shard_count: int) -> dict:
+    """Build the shard-local view of *manifest*.
+
+    The result carries only the file entries owned by *shard* plus the
+    index-level fields, and records which shard it belongs to so that
+    :func:`merge_fragments` can check it.
+    """
+    local = {
+        key: value for key, value in manifest.items()
+        if key not in _FRAGMENT_KEYS
+    }
+    local["files"] = {
+        key: meta for key, meta in manifest.get("files", {}).items()
+        if shard_for_url(meta.get("url", ""), shard_count) == shard
+    }
+    local["shard"] = shard
+    local["shard_count"] = shard_count
+    return local
+
+
+def fragment_path(
+    shard: int,
+    shard_count: int,
+    output_dir: Path = OUTPUT_DIR,
+) -> Path:
+    """Return the manifest fragment path written by *shard*."""
+    return output_dir / f"manifest.shard-{shard}-of-{shard_count}.json"
+
+
+def merge_fragments(
+    manifest_file: Path = MANIFEST_FILE,
+    output_dir: Path = OUTPUT_DIR,
+) -> int:
+    """Merge all shard fragments into the canonical manifest.
+
+    Every shard of the run must be present: each fragment is
+    authoritative for the URLs it owns, so the merged ``files`` map is
+    the union of the fragments.  Holds the manifest lock for the whole
+    read-modify-write and deletes the fragments once the manifest is
+    saved.
+
+    Raises ``ValueError`` on a conflict (mixed shard counts, duplicate
+    or missing shards, an entry in the wrong shard, or one file claimed
+    by two shards); the manifest is left untouched in that case.
+    Returns the number of fragments merged.
+    """
+    with manifest_lock(manifest_file):
+        paths = sorted(output_dir.glob(FRAGMENT_GLOB))
+        if not paths:
+            raise ValueError(f"No shard fragments found in {output_dir}")
+
+        fragments = [json.loads(p.read_text("utf-8")) for p in paths]
+
+        counts = {frag.get("shard_count") for frag in fragments}
+        if len(counts) != 1:
+            raise ValueError(
+                f"Shard fragments disagree on shard count: {sorted(counts)}"
+            )
+        shard_count = counts.pop()
+
+        seen = [frag.get("shard") for frag in fragments]
+        if len(set(seen)) != len(seen):
+            raise ValueError(f"Duplicate shard fragments: {sorted(seen)}")
+        missing = sorted(set(range(1, shard_count + 1)) - set(seen))
+        if missing:
+            raise ValueError(
+                f"Missing fragments for shard(s) {missing} of {shard_count}"
+            )
+
+        merged: dict[str, dict] = {}
+        owners: dict[str, int] = {}
+        for frag in fragments:
+            shard = frag["shard"]
+            for key, meta in frag.get("files", {}).items():
+                owner = shard_for_url(meta.get("url", ""), shard_count)
+                if owner != shard:
+                    raise ValueError(
+                        f"Conflict: {key} is in shard {shard} but its URL "
+                        f"belongs to shard {owner}"
+                    )
+                if key in merged:
+                    raise ValueError(
+                        f"Conflict: {key} written by shards "
+                        f"{owners[key]} and {shard}"
+                    )
+                merged[key] = meta
+                owners[key] = shard
+
+        manifest = load_manifest(manifest_file)
+        manifest["files"] = merged
+
+        # Index-level fields must agree; shards that saw different
+        # versions of the index would leave the URL list inconsistent,
+        # so clear the field and let the next run re-read the index.
+        index_keys = {
+            key for frag in fragments for key in frag
+            if key not in _FRAGMENT_KEYS
+        }
+        for key in sorted(index_keys):
+            values = [frag.get(key) for frag in fragments]
+            if key in _EARLIEST_KEYS:
+                manifest[key] = None if None in values else min(values)
+            elif all(value == values[0] for value in values):
+                manifest[key] = values[0]
+            else:
+                log.warning(
+                    "Shard fragments disagree on %s; clearing it so the "
+                    "next run re-reads the index", key,
+                )
+                manifest[key] = None
+
+        save_manifest(
+            manifest,
+            manifest_file=manifest_file,
+            output_dir=output_dir,
+        )
+        for path in paths:
+            path.unlink()
+
+    return len(fragments)
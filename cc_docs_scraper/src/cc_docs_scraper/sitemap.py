@@ -0,0 +1,195 @@
+"""Sitemap-driven selection of pages that may have changed.
+
+Instead of revalidating every known page, the optional sitemap phase
+fetches ``sitemap.xml`` (conditionally), and only pages whose
+``<lastmod>`` is newer than their stored ``Last-Modified`` are passed
+on to the fetch phase.  Every ``FULL_SWEEP_INTERVAL`` a full sweep of
+all pages runs anyway, in case the sitemap lags behind.
+"""
+
+import calendar
+import logging
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Iterator
+
+import requests
+
+from .constants import FULL_SWEEP_INTERVAL, SITEMAP_URL, TIMESTAMP_FORMAT
+from .http import request_with_retry
+from .urls import normalize_url
+
+log = logging.getLogger("cc_docs_scraper")
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _iter_elements(chunks: Iterable[bytes]) -> Iterator[ET.Element]:
+    """Yield each element of the XML in *chunks* as it is closed."""
+    parser = ET.XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            yield elem
+    parser.close()  # raises ParseError on a truncated document
+    for _, elem in parser.read_events():
+        yield elem
+
+
+def parse_sitemap(chunks: Iterable[bytes]) -> dict[str, str | None]:
+    """Stream-parse a sitemap and return ``{page URL: lastmod}``.
+
+    *chunks* is any iterable of bytes (a response's ``iter_content``,
+    a binary file).  URLs are normalized to the canonical markdown
+    form; ``lastmod`` is ``None`` for entries without one.  Each chunk
+    is parsed as it arrives and ``<url>`` elements are discarded once
+    read, so the whole document is never held in memory.
+    """
+    entries: dict[str, str | None] = {}
+    loc = lastmod = None
+    for elem in _iter_elements(chunks):
+        name = _local_name(elem.tag)
+        if name == "loc":
+            loc = (elem.text or "").strip()
+        elif name == "lastmod":
+            lastmod = (elem.text or "").strip() or None
+        elif name == "url":
+            if loc:
+                entries[normalize_url(loc)] = lastmod
+            loc = lastmod = None
+            elem.clear()
+    return entries
+
+
+def fetch_sitemap(
+    last_modified: str | None = None,
+    *,
+    session: requests.Session | None = None,
+) -> tuple[dict[str, str | None] | None, str | None]:
+    """Fetch and parse the sitemap, conditionally on *last_modified*.
+
+    Returns ``(entries, Last-Modified)``, or ``(None, last_modified)``
+    on 304.
+    """
+    log.info("Fetching sitemap from %s", SITEMAP_URL)
+    resp = request_with_retry(
+        SITEMAP_URL, if_modified_since=last_modified, session=session,
+        stream=True,
+    )
+    with resp:
+        if resp.status_code == 304:
+            log.info("Sitemap unchanged (304)")
+            return None, last_modified
+        entries = parse_sitemap(resp.iter_content(_CHUNK_SIZE))
+
+    log.info("Found %d URLs in sitemap", len(entries))
+    return entries, resp.headers.get("Last-Modified")
+
+
+def _lastmod_epoch(lastmod: str) -> float:
+    """Parse a W3C datetime; a bare date means the end of that day."""
+    parsed = datetime.fromisoformat(lastmod)
+    if len(lastmod) == 10:  # YYYY-MM-DD
+        parsed += timedelta(days=1) - timedelta(microseconds=1)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def may_have_changed(lastmod: str | None, last_modified: str | None) -> bool:
+    """Return False only if *lastmod* is not newer than *last_modified*.
+
+    Missing or unparseable dates count as possibly changed.
+    """
+    if not lastmod or not last_modified:
+        return True
+    try:
+        return (
+            _lastmod_epoch(lastmod)
+            > parsedate_to_datetime(last_modified).timestamp()
+        )
+    except (TypeError, ValueError):
+        return True
+
+
+def full_sweep_due(manifest: dict, now: float | None = None) -> bool:
+    """Return True if the last full sweep is older than the interval."""
+    last = manifest.get("last_full_sweep")
+    if not last:
+        return True
+    try:
+        last_epoch = calendar.timegm(time.strptime(last, TIMESTAMP_FORMAT))
+    except ValueError:
+        return True
+    now = time.time() if now is None else now
+    return now - last_epoch >= FULL_SWEEP_INTERVAL
+
+
+def sitemap_candidates(
+    urls: list[str],
+    manifest: dict,
+    *,
+    verify_only: bool = False,
+    force: bool = False,
+    session: requests.Session | None = None,
+) -> list[str]:
+    """Return the subset of *urls* the sitemap says may have changed.
+
+    Each page's sitemap ``lastmod`` is stored as ``sitemap_lastmod`` in
+    its manifest entry, so a 304 on the sitemap reuses the last known
+    dates.  Pages missing from the manifest or the sitemap are always
+    candidates.  Returns all *urls* with *force*, when a full sweep is
+    due (recorded as ``last_full_sweep``), or if the sitemap cannot be
+    fetched.
+    """
+    if force:
+        return urls
+    if full_sweep_due(manifest):
+        log.info("Full sweep due; checking all %d pages", len(urls))
+        if not verify_only:
+            manifest["last_full_sweep"] = time.strftime(
+                TIMESTAMP_FORMAT, time.gmtime(),
+            )
+        return urls
+
+    try:
+        entries, sitemap_lm = fetch_sitemap(
+            manifest.get("sitemap_last_modified"), session=session,
+        )
+    except (requests.RequestException, ET.ParseError) as exc:
+        log.warning("Sitemap unavailable (%s); checking all pages", exc)
+        return urls
+
+    by_url = {
+        meta["url"]: meta
+        for meta in manifest.get("files", {}).values()
+        if "url" in meta
+    }
+    if entries is None:
+        lastmods = {
+            url: meta.get("sitemap_lastmod") for url, meta in by_url.items()
+        }
+    else:
+        lastmods = {url: entries.get(url) for url in by_url}
+        if not verify_only:
+            for url, meta in by_url.items():
+                meta["sitemap_lastmod"] = lastmods[url]
+            manifest["sitemap_last_modified"] = sitemap_lm
+
+    candidates = []
+    for url in urls:
+        meta = by_url.get(url, {})
+        if not meta.get("sha256") or may_have_changed(
+            lastmods.get(url), meta.get("last_modified"),
+        ):
+            candidates.append(url)
+    log.info(
+        "Sitemap: %d of %d pages may have changed", len(candidates), len(urls),
+    )
+    return candidates
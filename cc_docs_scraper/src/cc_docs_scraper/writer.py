@@ -0,0 +1,163 @@
+"""Crash-consistent file writes and the write-behind disk stage."""
+
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+
+from .constants import WRITE_BATCH_SIZE, WRITE_QUEUE_SIZE
+
+log = logging.getLogger("cc_docs_scraper")
+
+_STOP = object()
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp")
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Flush directory entries (renames) to disk."""
+    if os.name == "nt":  # pragma: no cover - directories can't be opened
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_temp(path: Path, text: str) -> Path:
+    """Write *text* to a temp file next to *path* and fsync it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = _temp_path(path)
+    with open(temp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+        fh.flush()
+        os.fsync(fh.fileno())
+    return temp
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Replace *path* with *text* so a crash leaves old or new content.
+
+    Writes a temp file, fsyncs it, renames it over *path*, then fsyncs
+    the directory so the rename itself is durable.
+    """
+    temp = _write_temp(path, text)
+    try:
+        os.replace(temp, path)
+    except OSError:
+        temp.unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)
+
+
+class DiskWriter:
+    """Write-behind stage that takes page writes off the fetch loop.
+
+    :meth:`submit` queues a page on a bounded queue (blocking when the
+    disk falls behind) and a background thread writes it.  The thread
+    drains up to *batch_size* pages at a time: each page goes to an
+    fsynced temp file and is renamed into place, then every directory
+    touched by the batch is fsynced once.  Call :meth:`close` before
+    committing the manifest; it returns the pages that failed.
+
+    If the writer thread itself dies, the error is kept and re-raised
+    by the next :meth:`submit` or :meth:`close` instead of blocking on
+    the full queue.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int = WRITE_BATCH_SIZE,
+        queue_size: int = WRITE_QUEUE_SIZE,
+    ) -> None:
+        self._batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._failed: dict[Path, Exception] = {}
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(
+            target=self._run, name="cc-docs-writer", daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self, path: Path, content: str) -> None:
+        """Queue *content* to be written to *path*."""
+        self._put((path, content))
+
+    def close(self) -> dict[Path, Exception]:
+        """Flush all queued pages and stop the writer thread.
+
+        Returns ``{path: error}`` for every page that was not written.
+        """
+        if self._thread.is_alive():
+            self._put(_STOP)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return dict(self._failed)
+
+    def _put(self, item: object) -> None:
+        """Put *item* on the queue, unless the writer thread has died."""
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __enter__(self) -> "DiskWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self._batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = _STOP in batch
+                self._write_batch(
+                    [item for item in batch if item is not _STOP],
+                )
+                if stop:
+                    return
+        except BaseException as exc:
+            log.error("Disk writer stopped: %r", exc)
+            self._error = exc
+
+    def _write_batch(self, batch: list[tuple[Path, str]]) -> None:
+        dirs: set[Path] = set()
+        for path, content in batch:
+            try:
+                temp = _write_temp(path, content)
+                os.replace(temp, path)
+            except (OSError, ValueError) as exc:  # ValueError: encoding
+                _temp_path(path).unlink(missing_ok=True)
+                self._failed[path] = exc
+                continue
+            dirs.add(path.parent)
+
+        for directory in dirs:
+            try:
+                _fsync_dir(directory)
+            except OSError as exc:
+                for path, _ in batch:
+                    if path.parent == directory:
+                        self._failed[path] = exc
+
+        if batch:
+            log.debug(
+                "  committed %d file(s) in %d dir(s)", len(batch), len(dirs),
+            )
@@ -0,0 +1,176 @@
+"""Tests for cc_docs_scraper.cassette."""
+
+import sys
+import time
+
+import pytest
+import requests
+
+from cc_docs_scraper import cli, http
+from cc_docs_scraper.cassette import (
+    Cassette,
+    RecordingAdapter,
+    ReplayAdapter,
+    replay_session,
+)
+from cc_docs_scraper.constants import INDEX_URL
+
+URL_A = "https://code.claude.com/docs/en/page-a.md"
+URL_B = "https://code.claude.com/docs/en/page-b.md"
+PAGE = "# Title\n\nThis is a paragraph with enough content to pass the minimum length validation check."
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+def _exchange(url, status=200, body="", headers=None, **extra):
+    return {
+        "method": "GET",
+        "url": url,
+        "status": status,
+        "headers": headers or {},
+        "body": body,
+        "body_encoding": "utf-8",
+        "elapsed": 0.2,
+        **extra,
+    }
+
+
+def _site_cassette():
+    index = f"- [A]({URL_A})\n- [B]({URL_B})\n"
+    return Cassette([
+        _exchange(INDEX_URL, body=index, headers={"Last-Modified": LAST_MODIFIED}),
+        _exchange(URL_A, body=PAGE, headers={"Last-Modified": LAST_MODIFIED}),
+        _exchange(URL_B, body=PAGE.replace("Title", "Other")),
+    ])
+
+
+@pytest.fixture(autouse=True)
+def _reset_session(monkeypatch):
+    monkeypatch.setattr(http, "_session", None)
+
+
+# -- Cassette --------------------------------------------------------------
+
+class TestCassette:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "run.jsonl.gz"
+        cassette = _site_cassette()
+        cassette.save(path)
+        assert Cassette.load(path).exchanges == cassette.exchanges
+
+    def test_binary_body_survives(self, tmp_path):
+        path = tmp_path / "run.jsonl.gz"
+        recorded = Cassette()
+        inner = ReplayAdapter(Cassette([_exchange(URL_A)]))
+        inner._queues[("GET", URL_A)][0].update(
+            body="//4A", body_encoding="base64",
+        )
+        session = requests.Session()
+        session.mount("https://", RecordingAdapter(recorded, inner=inner))
+        session.get(URL_A)
+        recorded.save(path)
+
+        replayed = replay_session(Cassette.load(path)).get(URL_A)
+        assert replayed.content == b"\xff\xfe\x00"
+
+
+# -- ReplayAdapter / RecordingAdapter --------------------------------------
+
+class TestReplay:
+    def test_serves_exchanges_in_order(self):
+        cassette = Cassette([
+            _exchange(URL_A, status=200, body="first"),
+            _exchange(URL_A, status=304),
+        ])
+        session = replay_session(cassette)
+        assert session.get(URL_A).text == "first"
+        assert session.get(URL_A).status_code == 304
+
+    def test_missing_exchange_raises(self):
+        with pytest.raises(requests.ConnectionError, match="No recorded"):
+            replay_session(Cassette()).get(URL_A)
+
+    def test_recorded_error_is_raised(self):
+        cassette = Cassette([
+            {"method": "GET", "url": URL_A, "error": "ReadTimeout", "message": "slow"},
+        ])
+        with pytest.raises(requests.ReadTimeout):
+            replay_session(cassette).get(URL_A)
+
+    def test_timing_preserved(self):
+        cassette = Cassette([_exchange(URL_A, body="x", elapsed=0.05)])
+        session = replay_session(cassette, timing=True)
+        started = time.monotonic()
+        session.get(URL_A)
+        assert time.monotonic() - started >= 0.05
+
+    def test_recording_captures_exchanges(self):
+        recorded = Cassette()
+        session = requests.Session()
+        session.mount(
+            "https://",
+            RecordingAdapter(recorded, inner=ReplayAdapter(_site_cassette())),
+        )
+        session.get(INDEX_URL, headers={"If-Modified-Since": LAST_MODIFIED})
+        with pytest.raises(requests.ConnectionError):
+            session.get("https://code.claude.com/docs/en/missing.md")
+
+        ok, failed = recorded.exchanges
+        assert ok["status"] == 200
+        assert ok["headers"]["Last-Modified"] == LAST_MODIFIED
+        assert ok["request_headers"]["If-Modified-Since"] == LAST_MODIFIED
+        assert URL_A in ok["body"]
+        assert failed["error"] == "ConnectionError"
+
+    def test_wire_bytes_round_trip(self):
+        recorded = Cassette()
+        inner = ReplayAdapter(
+            Cassette([_exchange(URL_A, body=PAGE, wire_bytes=42)]),
+        )
+        session = requests.Session()
+        session.mount("https://", RecordingAdapter(recorded, inner=inner))
+        session.get(URL_A)
+
+        assert recorded.exchanges[0]["wire_bytes"] == 42
+        replayed = replay_session(recorded).get(URL_A)
+        assert http.wire_bytes(replayed) == 42
+
+    def test_wire_bytes_default_to_body_size(self):
+        resp = replay_session(Cassette([_exchange(URL_A, body=PAGE)])).get(
+            URL_A,
+        )
+        assert http.wire_bytes(resp) == len(PAGE)
+
+
+# -- cli.main --------------------------------------------------------------
+
+class TestCliReplay:
+    def test_replayed_run_builds_mirror(self, tmp_path, monkeypatch):
+        cassette_file = tmp_path / "run.jsonl.gz"
+        _site_cassette().save(cassette_file)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, "argv", ["cc-docs-scraper", "--replay", str(cassette_file)])
+
+        started = time.monotonic()
+        cli.main()
+        # Full speed: no rate-limit sleeps, no recorded latency
+        assert time.monotonic() - started < 0.5
+
+        assert (tmp_path / "docs" / "page-a.md").read_text() == PAGE
+        assert (tmp_path / "docs" / "page-b.md").exists()
+        assert (tmp_path / "docs" / "manifest.json").exists()
+
+    def test_record_writes_cassette(self, tmp_path, monkeypatch):
+        cassette_file = tmp_path / "rec.jsonl.gz"
+        # Stand in for the network with a replay of the site
+        monkeypatch.setattr(
+            "cc_docs_scraper.cassette.HTTPAdapter",
+            lambda: ReplayAdapter(_site_cassette()),
+        )
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, "argv", ["cc-docs-scraper", "--record", str(cassette_file)])
+        monkeypatch.setattr("cc_docs_scraper.orchestrator.time.sleep", lambda s: None)
+
+        cli.main()
+
+        urls = [e["url"] for e in Cassette.load(cassette_file).exchanges]
+        assert urls == [INDEX_URL, URL_A, URL_B]
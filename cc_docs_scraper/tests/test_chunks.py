@@ -0,0 +1,116 @@
+"""Tests for cc_docs_scraper.chunks."""
+
+import json
+
+from cc_docs_scraper.chunks import (
+    diff_chunks,
+    load_chunk_index,
+    page_chunks,
+    slugify,
+    update_chunk_index,
+)
+from cc_docs_scraper.shards import shard_for_url
+
+URL_A = "https://code.claude.com/docs/en/page-a.md"
+URL_B = "https://code.claude.com/docs/en/page-b.md"
+
+PAGE = "intro\n\n# Setup\n\nstep one\n\n## Usage\n\nrun it\n\n## Usage\n\nagain\n"
+
+
+# -- page_chunks ------------------------------------------------------------
+
+class TestPageChunks:
+    def test_slugify(self):
+        assert slugify("Hooks & Events: PreToolUse") == "hooks--events-pretooluse"
+        assert slugify("") == "top"
+
+    def test_ids_are_stable_and_unique(self):
+        chunks = page_chunks("setup.md", PAGE)
+        assert list(chunks) == [
+            "setup.md#top",
+            "setup.md#setup",
+            "setup.md#usage",
+            "setup.md#usage-1",
+        ]
+        assert page_chunks("setup.md", PAGE) == chunks
+
+    def test_suffix_skips_ids_already_emitted(self):
+        page = "# Foo\n\na\n\n# Foo\n\nb\n\n# Foo 1\n\nc\n\n# Foo\n\nd\n"
+        chunks = page_chunks("foo.md", page)
+        assert list(chunks) == [
+            "foo.md#foo",
+            "foo.md#foo-1",
+            "foo.md#foo-1-1",
+            "foo.md#foo-2",
+        ]
+        assert len(set(chunks.values())) == 4
+
+    def test_edit_changes_only_one_chunk(self):
+        old = page_chunks("setup.md", PAGE)
+        new = page_chunks("setup.md", PAGE.replace("step one", "step 1"))
+        assert diff_chunks(old, new) == {
+            "added": [], "changed": ["setup.md#setup"], "removed": [],
+        }
+
+
+# -- update_chunk_index -----------------------------------------------------
+
+class TestUpdateChunkIndex:
+    def _manifest(self, output_dir, *names):
+        return {"files": {
+            str(output_dir / name): {"url": url}
+            for name, url in names
+        }}
+
+    def test_first_run_adds_all_chunks(self, output_dir):
+        index_file = output_dir / "chunks.json"
+        key = str(output_dir / "page-a.md")
+        chunks = page_chunks("page-a.md", PAGE)
+        manifest = self._manifest(output_dir, ("page-a.md", URL_A))
+
+        delta = update_chunk_index(
+            {key: (URL_A, chunks)}, manifest,
+            output_dir=output_dir, index_file=index_file,
+        )
+        assert delta["added"] == list(chunks)
+        assert load_chunk_index(index_file)[key]["chunks"] == chunks
+
+    def test_backfills_pages_on_disk(self, output_dir):
+        (output_dir / "page-a.md").write_text(PAGE, "utf-8")
+        manifest = self._manifest(output_dir, ("page-a.md", URL_A))
+        delta = update_chunk_index(
+            {}, manifest,
+            output_dir=output_dir, index_file=output_dir / "chunks.json",
+        )
+        assert len(delta["added"]) == 4
+
+    def test_removed_page_drops_chunks(self, output_dir):
+        index_file = output_dir / "chunks.json"
+        key = str(output_dir / "page-a.md")
+        index_file.write_text(json.dumps({
+            key: {"url": URL_A, "chunks": {"page-a.md#top": "abc"}},
+        }))
+        delta = update_chunk_index(
+            {}, {"files": {}},
+            output_dir=output_dir, index_file=index_file,
+        )
+        assert delta["removed"] == ["page-a.md#top"]
+        assert load_chunk_index(index_file) == {}
+
+    def test_shard_keeps_other_shards_pages(self, output_dir):
+        index_file = output_dir / "chunks.json"
+        index_file.write_text(json.dumps({
+            str(output_dir / "page-a.md"): {"url": URL_A, "chunks": {}},
+            str(output_dir / "page-b.md"): {"url": URL_B, "chunks": {}},
+        }))
+        shard_a = shard_for_url(URL_A, 2)
+        shard_b = shard_for_url(URL_B, 2)
+        assert shard_a != shard_b
+
+        update_chunk_index(
+            {}, {"files": {}, "shard": shard_a, "shard_count": 2},
+            output_dir=output_dir, index_file=index_file,
+        )
+        assert list(load_chunk_index(index_file)) == [
+            str(output_dir / "page-b.md"),
+        ]
@@ -1,6 +1,6 @@
 """Tests for cc_docs_scraper.content."""
 
-from cc_docs_scraper.content import compute_hash, validate_markdown
+from cc_docs_scraper.content import compute_hash, split_sections, validate_markdown
 
 URL = "https://code.claude.com/docs/en/example.md"
 
@@ -49,3 +49,29 @@ class TestValidateMarkdown:
     def test_accepts_blockquote(self):
         content = "> This is a blockquote with enough text to pass the minimum length validation check."
         assert validate_markdown(URL, content) is True
+
+
+# -- split_sections --------------------------------------------------------
+
+class TestSplitSections:
+    def test_splits_on_headings(self):
+        content = "# Title\n\nIntro\n\n## Setup\n\nSteps\n"
+        assert split_sections(content) == [
+            ("Title", "# Title\n\nIntro\n\n"),
+            ("Setup", "## Setup\n\nSteps\n"),
+        ]
+
+    def test_preamble_before_first_heading(self):
+        sections = split_sections("Preface\n# Title\nBody\n")
+        assert sections[0] == ("", "Preface\n")
+
+    def test_ignores_headings_in_code_fences(self):
+        content = "# Title\n\n```bash\n# a comment\n```\n"
+        assert [h for h, _ in split_sections(content)] == ["Title"]
+
+    def test_strips_closing_hashes(self):
+        assert split_sections("## Setup ##\ntext\n")[0][0] == "Setup"
+
+    def test_sections_reassemble_content(self):
+        content = "intro\n# A\n\ntext\n## B\nmore"
+        assert "".join(t for _, t in split_sections(content)) == content
@@ -0,0 +1,107 @@
+"""Tests for cc_docs_scraper.diff."""
+
+import difflib
+import random
+
+from cc_docs_scraper.diff import diff_lines, page_change_report, unified_hunks
+
+
+def _apply(a, b, opcodes):
+    """Rebuild *b* from *a* using *opcodes*, checking they are contiguous."""
+    out, i, j = [], 0, 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+        out.extend(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return out
+
+
+# -- diff_lines ------------------------------------------------------------
+
+class TestDiffLines:
+    def test_identical(self):
+        assert diff_lines(["a", "b"], ["a", "b"]) == [("equal", 0, 2, 0, 2)]
+
+    def test_empty_sides(self):
+        assert diff_lines([], ["a"]) == [("insert", 0, 0, 0, 1)]
+        assert diff_lines(["a"], []) == [("delete", 0, 1, 0, 0)]
+        assert diff_lines([], []) == []
+
+    def test_replace_in_middle(self):
+        ops = diff_lines(["a", "b", "c"], ["a", "x", "c"])
+        assert ops == [
+            ("equal", 0, 1, 0, 1),
+            ("replace", 1, 2, 1, 2),
+            ("equal", 2, 3, 2, 3),
+        ]
+
+    def test_opcodes_rebuild_target(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            a = [rng.choice("abcde") for _ in range(rng.randint(0, 12))]
+            b = [rng.choice("abcde") for _ in range(rng.randint(0, 12))]
+            assert _apply(a, b, diff_lines(a, b)) == b
+
+    def test_moved_block_keeps_unique_anchors(self):
+        a = ["intro", "alpha", "beta", "gamma", "outro"]
+        b = ["intro", "gamma", "alpha", "beta", "outro"]
+        equal = sum(i2 - i1 for tag, i1, i2, _, _ in diff_lines(a, b) if tag == "equal")
+        assert equal == 4
+
+    def test_repetitive_input_is_fast(self):
+        # difflib's worst case; must not go quadratic here
+        a = ["x", "y"] * 20000
+        b = ["y", "x"] * 20000
+        assert _apply(a, b, diff_lines(a, b)) == b
+
+
+# -- unified_hunks ---------------------------------------------------------
+
+class TestUnifiedHunks:
+    def test_matches_difflib_format(self):
+        a = [f"line {i}" for i in range(20)]
+        b = a[:5] + ["changed"] + a[6:15] + a[16:]
+        expected = [
+            line for line in difflib.unified_diff(a, b, lineterm="", n=3)
+        ][2:]
+        hunks = unified_hunks(a, b, diff_lines(a, b))
+        assert "\n".join(hunks).splitlines() == expected
+
+    def test_no_changes(self):
+        assert unified_hunks(["a"], ["a"], diff_lines(["a"], ["a"])) == []
+
+
+# -- page_change_report ----------------------------------------------------
+
+class TestPageChangeReport:
+    OLD = "# Title\n\nIntro\n\n## Setup\n\nStep one\n\n## Legacy\n\nOld stuff\n"
+    NEW = "# Title\n\nIntro\n\n## Setup\n\nStep two\n\n## Hooks\n\nNew stuff\n"
+
+    def test_sections(self):
+        report = page_change_report(self.OLD, self.NEW)
+        assert report["sections"] == {
+            "added": ["Hooks"],
+            "removed": ["Legacy"],
+            "modified": ["Setup"],
+        }
+
+    def test_line_counts(self):
+        report = page_change_report(self.OLD, self.NEW)
+        assert report["lines_added"] == 3
+        assert report["lines_removed"] == 3
+        assert len(report["hunks"]) == 1
+
+    def test_new_page(self):
+        report = page_change_report("", self.NEW)
+        assert report["lines_removed"] == 0
+        assert report["lines_added"] == len(self.NEW.splitlines())
+        assert report["sections"]["added"] == ["Title", "Setup", "Hooks"]
+
+    def test_repeated_headings_are_numbered(self):
+        old = "# A\n\n## Example\n\none\n\n## Example\n\ntwo\n"
+        new = "# A\n\n## Example\n\none\n\n## Example\n\nthree\n"
+        report = page_change_report(old, new)
+        assert report["sections"]["modified"] == ["Example (2)"]
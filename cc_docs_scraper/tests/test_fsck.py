@@ -0,0 +1,100 @@
+"""Tests for cc_docs_scraper.fsck."""
+
+import json
+from pathlib import Path
+
+from cc_docs_scraper import orchestrator
+from cc_docs_scraper.fsck import check_mirror, repair_mirror, scan_pages
+from cc_docs_scraper.http import FetchResult
+
+URL_A = "https://code.claude.com/docs/en/page-a.md"
+URL_B = "https://code.claude.com/docs/en/sub/page-b.md"
+PAGE = "# Title\n\nThis is a paragraph with enough content to pass the minimum length validation check."
+
+
+def _mirror(output_dir):
+    """Manifest with page-a on disk and sub/page-b missing, plus an orphan."""
+    (output_dir / "page-a.md").write_text(PAGE)
+    (output_dir / "old").mkdir()
+    (output_dir / "old" / "renamed.md").write_text(PAGE)
+    (output_dir / ".reports").mkdir()
+    (output_dir / ".reports" / "changes.md").write_text("report")
+    (output_dir / ".page-a.md.tmp").write_text("partial")
+    (output_dir / "manifest.json").write_text("{}")
+    return {"files": {
+        str(output_dir / "page-a.md"): {"url": URL_A, "sha256": "a"},
+        str(output_dir / "sub" / "page-b.md"): {"url": URL_B, "sha256": "b"},
+    }}
+
+
+class TestScanPages:
+    def test_finds_nested_pages_and_skips_dot_entries(self, output_dir):
+        _mirror(output_dir)
+        assert scan_pages(output_dir, workers=2) == {
+            str(output_dir / "page-a.md"),
+            str(output_dir / "old" / "renamed.md"),
+        }
+
+    def test_missing_dir(self, tmp_path):
+        assert scan_pages(tmp_path / "nope") == set()
+
+
+class TestCheckMirror:
+    def test_orphans_and_missing(self, output_dir):
+        result = check_mirror(_mirror(output_dir), output_dir)
+        assert result.orphans == [output_dir / "old" / "renamed.md"]
+        assert result.missing == [output_dir / "sub" / "page-b.md"]
+        assert not result.clean
+
+    def test_clean(self, output_dir):
+        manifest = _mirror(output_dir)
+        (output_dir / "old" / "renamed.md").unlink()
+        del manifest["files"][str(output_dir / "sub" / "page-b.md")]
+        assert check_mirror(manifest, output_dir).clean
+
+
+class TestRepairMirror:
+    def test_deletes_orphans_and_refetches_missing_only(self, output_dir):
+        manifest = _mirror(output_dir)
+        result = check_mirror(manifest, output_dir)
+        fetched = []
+
+        def fetch_fn(url, if_modified_since=None):
+            fetched.append((url, if_modified_since))
+            return FetchResult(PAGE, None, False)
+
+        stats = repair_mirror(
+            result, manifest,
+            output_dir=output_dir,
+            fetch_fn=fetch_fn,
+            manifest_file=output_dir / "manifest.json",
+            rate_limit=False,
+        )
+        assert fetched == [(URL_B, None)]
+        assert stats["new"] == 1
+        assert not (output_dir / "old" / "renamed.md").exists()
+        assert (output_dir / "sub" / "page-b.md").read_text() == PAGE
+        assert check_mirror(manifest, output_dir).clean
+
+    def test_failed_refetch_keeps_page_tracked(
+        self, output_dir, monkeypatch,
+    ):
+        monkeypatch.setattr(orchestrator, "retry_delay", lambda attempt: 0)
+        manifest = _mirror(output_dir)
+        result = check_mirror(manifest, output_dir)
+        missing = str(output_dir / "sub" / "page-b.md")
+
+        stats = repair_mirror(
+            result, manifest,
+            output_dir=output_dir,
+            fetch_fn=lambda url, ims=None: FetchResult(
+                None, None, False, retryable=True,
+            ),
+            manifest_file=output_dir / "manifest.json",
+            rate_limit=False,
+        )
+        assert stats["failed"] == 1
+        saved = json.loads((output_dir / "manifest.json").read_text())
+        assert saved["files"][missing]["url"] == URL_B
+        assert "sha256" not in saved["files"][missing]
+        assert check_mirror(manifest, output_dir).missing == [Path(missing)]
@@ -0,0 +1,343 @@
+"""Tests for cc_docs_scraper.http."""
+
+import calendar
+import gzip
+import http.client as httplib
+import io
+import time
+
+import pytest
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from cc_docs_scraper import http
+from cc_docs_scraper.cassette import Cassette, RecordingAdapter
+from cc_docs_scraper.constants import MIN_REQUEST_TIMEOUT
+from cc_docs_scraper.http import (
+    ACCEPT_ENCODING,
+    FetchResult,
+    compare_metadata,
+    fetch_markdown,
+    freshness_deadline,
+    is_fresh,
+    make_probe_fetch,
+    wire_bytes,
+)
+
+NOW = calendar.timegm((2025, 1, 1, 0, 0, 0))
+DATE = "Wed, 01 Jan 2025 00:00:00 GMT"
+LATER = "Thu, 02 Jan 2025 00:00:00 GMT"
+URL = "https://code.claude.com/docs/en/example.md"
+ENTRY = {
+    "url": URL,
+    "sha256": "abc",
+    "etag": '"v1"',
+    "size": 120,
+    "last_modified": DATE,
+}
+
+
+def _response(status=200, headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    resp._content = b""
+    return resp
+
+
+class _Socket:
+    def __init__(self, data):
+        self.data = data
+
+    def makefile(self, mode):
+        return io.BytesIO(self.data)
+
+
+def _chunked_response(headers, body, chunk_size=50):
+    """Parse a ``Transfer-Encoding: chunked`` response carrying *body*."""
+    lines = ["HTTP/1.1 200 OK", "Transfer-Encoding: chunked"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    data = ("\r\n".join(lines) + "\r\n\r\n").encode()
+    for start in range(0, len(body), chunk_size):
+        chunk = body[start:start + chunk_size]
+        data += b"%x\r\n%s\r\n" % (len(chunk), chunk)
+    data += b"0\r\n\r\n"
+    resp = httplib.HTTPResponse(_Socket(data), method="GET")
+    resp.begin()
+    return urllib3.HTTPResponse(
+        body=resp,
+        headers=dict(resp.getheaders()),
+        status=resp.status,
+        preload_content=False,
+        original_response=resp,
+    )
+
+
+class _GzipAdapter(HTTPAdapter):
+    """Serves *body* gzip-compressed and remembers the request headers.
+
+    With *chunked*, the body is sent with ``Transfer-Encoding: chunked``
+    instead of a known length.
+    """
+
+    def __init__(self, body, *, chunked=False):
+        super().__init__()
+        self.body = body
+        self.chunked = chunked
+        self.request_headers = None
+
+    def send(self, request, **kwargs):
+        self.request_headers = request.headers
+        headers = {"Content-Encoding": "gzip", "Last-Modified": DATE}
+        body = gzip.compress(self.body)
+        if self.chunked:
+            raw = _chunked_response(headers, body)
+        else:
+            raw = urllib3.HTTPResponse(
+                body=io.BytesIO(body),
+                headers=headers,
+                status=200,
+                preload_content=False,
+            )
+        return self.build_response(request, raw)
+
+
+def _gzip_session(body, *, chunked=False):
+    session = requests.Session()
+    adapter = _GzipAdapter(body, chunked=chunked)
+    session.mount("https://", adapter)
+    return session, adapter
+
+
+# -- FetchResult -----------------------------------------------------------
+
+class TestFetchResult:
+    def test_accepts_legacy_three_tuple(self):
+        result = FetchResult(*("body", DATE, False))
+        assert result.content == "body"
+        assert result.fresh_until is None
+
+
+# -- freshness_deadline ----------------------------------------------------
+
+class TestFreshnessDeadline:
+    def test_max_age(self):
+        headers = {"Cache-Control": "public, max-age=3600"}
+        assert freshness_deadline(headers, now=NOW) == "2025-01-01T01:00:00Z"
+
+    def test_age_is_subtracted(self):
+        headers = {"Cache-Control": "max-age=3600", "Age": "600"}
+        assert freshness_deadline(headers, now=NOW) == "2025-01-01T00:50:00Z"
+
+    def test_max_age_wins_over_expires(self):
+        headers = {
+            "Cache-Control": "max-age=60",
+            "Expires": "Thu, 02 Jan 2025 00:00:00 GMT",
+        }
+        assert freshness_deadline(headers, now=NOW) == "2025-01-01T00:01:00Z"
+
+    def test_expires_relative_to_date(self):
+        headers = {
+            "Date": DATE,
+            "Expires": "Wed, 01 Jan 2025 00:10:00 GMT",
+        }
+        # Local clock is 5 minutes ahead of the server; lifetime is kept
+        later = NOW + 300
+        assert freshness_deadline(headers, now=later) == "2025-01-01T00:15:00Z"
+
+    def test_invalid_expires_is_stale(self):
+        assert freshness_deadline({"Expires": "0"}, now=NOW) is None
+
+    def test_no_cache_is_never_fresh(self):
+        headers = {"Cache-Control": "no-cache, max-age=3600"}
+        assert freshness_deadline(headers, now=NOW) is None
+
+    def test_no_store_is_never_fresh(self):
+        assert freshness_deadline({"Cache-Control": "no-store"}, now=NOW) is None
+
+    def test_age_exceeding_lifetime(self):
+        headers = {"Cache-Control": "max-age=60", "Age": "120"}
+        assert freshness_deadline(headers, now=NOW) is None
+
+    def test_no_headers(self):
+        assert freshness_deadline({}, now=NOW) is None
+
+
+# -- is_fresh --------------------------------------------------------------
+
+class TestIsFresh:
+    def test_future_deadline(self):
+        assert is_fresh("2025-01-01T01:00:00Z", now=NOW) is True
+
+    def test_past_deadline(self):
+        assert is_fresh("2024-12-31T23:59:59Z", now=NOW) is False
+
+    def test_missing_or_malformed(self):
+        assert is_fresh(None) is False
+        assert is_fresh("yesterday") is False
+
+    def test_defaults_to_current_time(self):
+        future = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 60))
+        assert is_fresh(future) is True
+
+
+# -- compare_metadata ------------------------------------------------------
+
+class TestCompareMetadata:
+    def test_matching_etag(self):
+        assert compare_metadata({"ETag": '"v1"'}, ENTRY) == "unchanged"
+
+    def test_weak_etag_matches_strong(self):
+        assert compare_metadata({"ETag": 'W/"v1"'}, ENTRY) == "unchanged"
+
+    def test_different_strong_etag(self):
+        assert compare_metadata({"ETag": '"v2"'}, ENTRY) == "changed"
+
+    def test_different_weak_etag_is_inconclusive(self):
+        assert compare_metadata({"ETag": 'W/"v2"'}, ENTRY) is None
+
+    def test_content_length_mismatch(self):
+        headers = {"Content-Length": "99", "Last-Modified": DATE}
+        assert compare_metadata(headers, {**ENTRY, "etag": None}) == "changed"
+
+    def test_encoded_length_is_ignored(self):
+        headers = {"Content-Length": "99", "Content-Encoding": "gzip"}
+        assert compare_metadata(headers, {**ENTRY, "etag": None}) is None
+
+    def test_same_last_modified(self):
+        headers = {"Content-Length": "120", "Last-Modified": DATE}
+        assert compare_metadata(headers, {**ENTRY, "etag": None}) == "unchanged"
+
+    def test_new_last_modified_same_length_is_inconclusive(self):
+        headers = {"Content-Length": "120", "Last-Modified": LATER}
+        assert compare_metadata(headers, {**ENTRY, "etag": None}) is None
+
+
+# -- make_probe_fetch ------------------------------------------------------
+
+class TestProbeFetch:
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        calls = {"methods": [], "get": 0}
+        responses = []
+
+        def fake_request(url, if_modified_since=None, *, if_none_match=None, method="GET", attempts=3):
+            calls["methods"].append(method)
+            calls["if_none_match"] = if_none_match
+            return responses.pop(0)
+
+        def fake_fetch(url, if_modified_since=None):
+            calls["get"] += 1
+            return FetchResult("# body", LATER, False)
+
+        monkeypatch.setattr(http, "request_with_retry", fake_request)
+        monkeypatch.setattr(http, "fetch_markdown", fake_fetch)
+        calls["responses"] = responses
+        return calls
+
+    def _probe(self, url=URL):
+        return make_probe_fetch({"files": {"docs/example.md": ENTRY}})(url, DATE)
+
+    def test_head_304_is_not_modified(self, calls):
+        calls["responses"].append(_response(304))
+        result = self._probe()
+        assert result.not_modified is True
+        assert calls["methods"] == ["HEAD"]
+        assert calls["if_none_match"] == '"v1"'
+        assert calls["get"] == 0
+
+    def test_changed_metadata_skips_body(self, calls):
+        calls["responses"].append(_response(200, {"ETag": '"v2"'}))
+        result = self._probe()
+        assert result.changed is True
+        assert result.content is None
+        assert calls["get"] == 0
+
+    def test_inconclusive_falls_back_to_get(self, calls):
+        calls["responses"].append(_response(200, {"Last-Modified": LATER}))
+        result = self._probe()
+        assert result.content == "# body"
+        assert calls["get"] == 1
+
+    def test_unknown_page_uses_get(self, calls):
+        result = self._probe("https://code.claude.com/docs/en/new.md")
+        assert result.content == "# body"
+        assert calls["methods"] == []
+
+    def test_request_failure(self, calls, monkeypatch):
+        def failing(*args, **kwargs):
+            raise requests.ConnectionError("boom")
+
+        monkeypatch.setattr(http, "request_with_retry", failing)
+        assert self._probe() == FetchResult(
+            None, None, False, retryable=True,
+        )
+
+
+# -- compression -----------------------------------------------------------
+
+class TestCompression:
+    BODY = ("# Title\n\n" + "Repetitive paragraph text. " * 200).encode()
+
+    def test_accept_encoding_is_explicit(self):
+        session, adapter = _gzip_session(self.BODY)
+        fetch_markdown(URL, session=session)
+        assert adapter.request_headers["Accept-Encoding"] == ACCEPT_ENCODING
+        assert "gzip" in ACCEPT_ENCODING
+
+    def test_head_asks_for_identity(self):
+        session, adapter = _gzip_session(b"")
+        http.request_with_retry(URL, method="HEAD", session=session)
+        assert adapter.request_headers["Accept-Encoding"] == "identity"
+
+    def test_fetch_records_wire_and_decoded_bytes(self):
+        session, _ = _gzip_session(self.BODY)
+        result = fetch_markdown(URL, session=session)
+        assert result.content == self.BODY.decode()
+        assert result.decoded_bytes == len(self.BODY)
+        assert result.wire_bytes == len(gzip.compress(self.BODY))
+        assert result.wire_bytes < result.decoded_bytes
+
+    def test_chunked_response_counts_wire_bytes(self):
+        session, _ = _gzip_session(self.BODY, chunked=True)
+        result = fetch_markdown(URL, session=session)
+        assert result.content == self.BODY.decode()
+        assert result.decoded_bytes == len(self.BODY)
+        assert result.wire_bytes == len(gzip.compress(self.BODY))
+
+    def test_recording_counts_chunked_wire_bytes(self):
+        cassette = Cassette()
+        session = requests.Session()
+        session.mount("https://", RecordingAdapter(
+            cassette, inner=_GzipAdapter(self.BODY, chunked=True),
+        ))
+        assert session.get(URL).content == self.BODY
+        wire = len(gzip.compress(self.BODY))
+        assert cassette.exchanges[0]["wire_bytes"] == wire
+
+    def test_wire_bytes_without_raw_stream(self):
+        resp = _response()
+        resp._content = b"abc"
+        assert wire_bytes(resp) == 3
+
+
+# -- request_with_retry ----------------------------------------------------
+
+class TestRequestTimeouts:
+    def test_timeout_is_recorded_and_backed_off(self, monkeypatch):
+        monkeypatch.setattr(http, "_trackers", {})
+        tracker = http.latency_tracker(URL)
+        for _ in range(50):
+            tracker.record(0.01)
+        timeouts = []
+
+        class SlowSession(requests.Session):
+            def request(self, method, url, **kwargs):
+                timeouts.append(kwargs["timeout"])
+                raise requests.ReadTimeout("slow")
+
+        for _ in range(2):
+            result = fetch_markdown(URL, session=SlowSession())
+            assert result.retryable is True
+        assert timeouts == [MIN_REQUEST_TIMEOUT, 2 * MIN_REQUEST_TIMEOUT]
@@ -0,0 +1,312 @@
+"""Tests for cc_docs_scraper.http2, against a local HTTP/2 stand-in."""
+
+import asyncio
+import shutil
+import ssl
+import subprocess
+import threading
+import time
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+h2 = pytest.importorskip("h2")
+
+import h2.config  # noqa: E402
+import h2.connection  # noqa: E402
+import h2.events  # noqa: E402
+import h2.exceptions  # noqa: E402
+
+from cc_docs_scraper import http, orchestrator  # noqa: E402
+from cc_docs_scraper.constants import USER_AGENT  # noqa: E402
+from cc_docs_scraper.http2 import Http2Fetcher  # noqa: E402
+from cc_docs_scraper.orchestrator import run_fetch  # noqa: E402
+
+HOST = "code.claude.com"
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+PAGE = "# Title {n}\n\nThis is a paragraph with enough content to pass the minimum length validation check."
+
+
+def _url(n):
+    return f"https://{HOST}/docs/en/page-{n}.md"
+
+
+class _StandIn:
+    """Minimal HTTP/2 docs server over TLS on a unix socket.
+
+    Serves *pages* (``{path: body}``) with a fixed ``Last-Modified``,
+    answers a matching ``If-Modified-Since`` with 304, and delays every
+    response by *delay* seconds.  Paths in :attr:`fail_once` get one
+    503 first.  :attr:`received` counts requests as they arrive.
+    """
+
+    def __init__(self, path, certfile, keyfile, pages, delay=0.0):
+        self.path = str(path)
+        self.pages = pages
+        self.delay = delay
+        self.fail_once = set()
+        self.connections = 0
+        self.received = 0
+        self.requests = []
+        self._handlers = set()
+        self._ssl = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self._ssl.load_cert_chain(certfile, keyfile)
+        self._ssl.set_alpn_protocols(["h2"])
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_unix_server(
+                self._handle, path=self.path, ssl=self._ssl,
+            ),
+            self._loop,
+        ).result()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._handlers.add(asyncio.current_task())
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(
+            client_side=False, header_encoding="utf-8",
+        ))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        try:
+            while data := await reader.read(65535):
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        self.received += 1
+                        self._loop.call_later(
+                            self.delay, self._respond,
+                            conn, writer, event.stream_id,
+                            dict(event.headers),
+                        )
+                writer.write(conn.data_to_send())
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, conn, writer, stream_id, headers):
+        self.requests.append(headers)
+        path = headers[":path"]
+        body = self.pages.get(path)
+        if path in self.fail_once:
+            self.fail_once.discard(path)
+            status, body = 503, ""
+        elif body is None:
+            status, body = 404, ""
+        elif headers.get("if-modified-since") == LAST_MODIFIED:
+            status, body = 304, ""
+        else:
+            status = 200
+        data = body.encode("utf-8")
+        try:
+            conn.send_headers(stream_id, [
+                (":status", str(status)),
+                ("content-length", str(len(data))),
+                ("last-modified", LAST_MODIFIED),
+            ], end_stream=not data)
+            if data:
+                conn.send_data(stream_id, data, end_stream=True)
+            writer.write(conn.data_to_send())
+        except h2.exceptions.H2Error:
+            pass  # the client went away
+
+    def close(self):
+        async def shutdown():
+            self._server.close()
+            for task in self._handlers:
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    """Self-signed certificate for the docs host."""
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not available")
+    d = tmp_path_factory.mktemp("tls")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", str(d / "key.pem"), "-out", str(d / "cert.pem"),
+            "-days", "1", "-subj", f"/CN={HOST}",
+            "-addext", f"subjectAltName=DNS:{HOST}",
+        ],
+        check=True, capture_output=True,
+    )
+    return d / "cert.pem", d / "key.pem"
+
+
+@pytest.fixture
+def server(tmp_path, certificate):
+    pages = {f"/docs/en/page-{n}.md": PAGE.format(n=n) for n in range(16)}
+    pages["/docs/en/html.md"] = "<!DOCTYPE html><html>" + "x" * 80
+    standin = _StandIn(tmp_path / "h2.sock", *certificate, pages)
+    yield standin
+    standin.close()
+
+
+def _fetcher(server, certificate, **kwargs):
+    verify = ssl.create_default_context(cafile=str(certificate[0]))
+    verify.verify_flags &= ~getattr(ssl, "VERIFY_X509_STRICT", 0)
+    transport = httpx.AsyncHTTPTransport(
+        http2=True, http1=False, uds=server.path, verify=verify,
+    )
+    return Http2Fetcher(transport=transport, **kwargs)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def fetcher(server, certificate):
+    with _fetcher(server, certificate) as fetcher:
+        yield fetcher
+
+
+@pytest.fixture(autouse=True)
+def _reset_trackers(monkeypatch):
+    monkeypatch.setattr(http, "_trackers", {})
+
+
+# -- Http2Fetcher ----------------------------------------------------------
+
+class TestHttp2Fetcher:
+    def test_fetches_page(self, fetcher, server):
+        result = fetcher(_url(0))
+        assert result.content == PAGE.format(n=0)
+        assert result.last_modified == LAST_MODIFIED
+        assert result.decoded_bytes == len(result.content)
+        headers = server.requests[0]
+        assert headers["user-agent"] == USER_AGENT
+        assert headers["accept-encoding"] == http.ACCEPT_ENCODING
+
+    def test_conditional_request_not_modified(self, fetcher, server):
+        result = fetcher(_url(0), LAST_MODIFIED)
+        assert result.not_modified is True
+        assert result.content is None
+        assert server.requests[0]["if-modified-since"] == LAST_MODIFIED
+
+    def test_server_error_is_retryable(self, fetcher, server):
+        server.fail_once.add("/docs/en/page-0.md")
+        assert fetcher(_url(0)).retryable is True
+        assert fetcher(_url(0)).content == PAGE.format(n=0)
+
+    def test_missing_page_is_retryable(self, fetcher):
+        assert fetcher(f"https://{HOST}/docs/en/gone.md").retryable is True
+
+    def test_html_rejected(self, fetcher):
+        result = fetcher(f"https://{HOST}/docs/en/html.md")
+        assert result.content is None
+        assert result.retryable is False
+
+    def test_disallowed_host_rejected(self, fetcher, server):
+        with pytest.raises(ValueError, match="not allowed"):
+            fetcher("https://example.com/docs/en/page-0.md")
+        assert server.requests == []
+
+    def test_prefetched_result_used(self, fetcher, server):
+        fetcher.prefetch([(_url(n), None) for n in range(4)])
+        for n in range(4):
+            assert fetcher(_url(n)).content == PAGE.format(n=n)
+        assert len(server.requests) == 4
+        assert server.connections == 1
+
+    def test_prefetch_ignored_for_other_validator(self, fetcher, server):
+        fetcher.prefetch([(_url(0), None)])
+        assert fetcher(_url(0), LAST_MODIFIED).not_modified is True
+
+    def test_prefetch_reads_ahead_a_bounded_window(
+        self, server, certificate,
+    ):
+        server.delay = 0.05
+        with _fetcher(server, certificate, max_streams=2) as fetcher:
+            fetcher.prefetch([(_url(n), None) for n in range(16)])
+            _wait_for(lambda: len(server.requests) == 4)
+            time.sleep(0.2)
+            assert server.received == 4  # 2 * max_streams, no more
+
+            assert fetcher(_url(0)).content == PAGE.format(n=0)
+            _wait_for(lambda: server.received == 5)
+            for n in range(1, 16):
+                assert fetcher(_url(n)).content == PAGE.format(n=n)
+        assert server.received == 16
+
+    def test_close_is_idempotent(self, server, certificate):
+        fetcher = _fetcher(server, certificate)
+        fetcher.prefetch([(_url(n), None) for n in range(4)])
+        fetcher.close()
+        fetcher.close()
+
+
+# -- run_fetch over HTTP/2 -------------------------------------------------
+
+class TestRunFetchHttp2:
+    def test_mirror_then_revalidate(self, fetcher, server, output_dir):
+        urls = [_url(n) for n in range(16)]
+        kwargs = dict(
+            fetch_fn=fetcher,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            rate_limit=False,
+        )
+        manifest = {"files": {}}
+        assert run_fetch(urls, manifest, **kwargs)["new"] == 16
+        assert (output_dir / "page-3.md").read_text() == PAGE.format(n=3)
+
+        stats = run_fetch(urls, manifest, **kwargs)
+        assert stats["not_modified"] == 16
+        assert server.connections == 1
+
+    def test_failed_page_retried(
+        self, fetcher, server, output_dir, monkeypatch,
+    ):
+        monkeypatch.setattr(orchestrator, "retry_delay", lambda attempt: 0)
+        server.fail_once.add("/docs/en/page-1.md")
+        stats = run_fetch(
+            [_url(0), _url(1)], {"files": {}},
+            fetch_fn=fetcher,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            rate_limit=False,
+        )
+        assert stats["new"] == 2
+        assert stats["failed"] == 0
+
+
+# -- benchmark -------------------------------------------------------------
+
+class TestBenchmark:
+    def test_multiplexing_beats_sequential(
+        self, fetcher, server, output_dir,
+    ):
+        server.delay = 0.05
+        urls = [_url(n) for n in range(16)]
+
+        def timed(fetch_fn):
+            started = time.monotonic()
+            stats = run_fetch(
+                urls, {"files": {}},
+                verify_only=True,
+                fetch_fn=fetch_fn,
+                output_dir=output_dir,
+                rate_limit=False,
+            )
+            assert stats["new"] == 16
+            return time.monotonic() - started
+
+        # Plain call: one request at a time, as with fetch_markdown
+        sequential = timed(lambda url, ims=None: fetcher(url, ims))
+        multiplexed = timed(fetcher)
+        assert multiplexed < sequential / 2, (
+            f"16 pages, 50 ms each: sequential {sequential:.2f}s, "
+            f"multiplexed {multiplexed:.2f}s"
+        )
+        assert server.connections == 1
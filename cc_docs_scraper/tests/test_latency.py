@@ -0,0 +1,152 @@
+"""Tests for cc_docs_scraper.latency."""
+
+import threading
+import time
+
+import pytest
+import requests
+
+from cc_docs_scraper.constants import (
+    LATENCY_MIN_SAMPLES,
+    LATENCY_TIMEOUT_FACTOR,
+    MIN_REQUEST_TIMEOUT,
+    REQUEST_TIMEOUT,
+)
+from cc_docs_scraper.latency import HedgeBudget, LatencyTracker, hedged_request
+
+
+class _FakeResponse:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _sender(*steps):
+    """Return a send() whose n-th call sleeps, then returns or raises."""
+    calls = iter(steps)
+    lock = threading.Lock()
+
+    def send():
+        with lock:
+            delay, outcome = next(calls)
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return send
+
+
+# -- LatencyTracker ---------------------------------------------------------
+
+class TestLatencyTracker:
+    def test_defaults_until_enough_samples(self):
+        tracker = LatencyTracker()
+        tracker.record(0.1)
+        assert tracker.timeout() == REQUEST_TIMEOUT
+        assert tracker.hedge_delay() is None
+
+    def test_percentile(self):
+        tracker = LatencyTracker(window=100)
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+        assert tracker.percentile(95) == 0.095
+        assert tracker.percentile(50) == 0.05
+
+    def test_window_is_rolling(self):
+        tracker = LatencyTracker(window=3)
+        for seconds in (9.0, 1.0, 1.0, 1.0):
+            tracker.record(seconds)
+        assert tracker.percentile(100) == 1.0
+
+    def test_timeout_clamped(self):
+        fast = LatencyTracker()
+        slow = LatencyTracker()
+        for _ in range(LATENCY_MIN_SAMPLES):
+            fast.record(0.01)
+            slow.record(60.0)
+        assert fast.timeout() == MIN_REQUEST_TIMEOUT
+        assert slow.timeout() == REQUEST_TIMEOUT
+
+
+    def test_timeouts_raise_the_estimate(self):
+        tracker = LatencyTracker(window=20)
+        for _ in range(20):
+            tracker.record(0.01)
+        assert tracker.timeout() == MIN_REQUEST_TIMEOUT
+        for _ in range(2):
+            tracker.record_timeout(MIN_REQUEST_TIMEOUT)
+        assert tracker.timeout() == (
+            MIN_REQUEST_TIMEOUT * LATENCY_TIMEOUT_FACTOR
+        )
+
+    def test_timeout_doubles_per_consecutive_timeout(self):
+        tracker = LatencyTracker(window=1000)
+        for _ in range(100):
+            tracker.record(0.01)
+        tracker.record_timeout(MIN_REQUEST_TIMEOUT, "slow")
+        assert tracker.timeout("slow") == 2 * MIN_REQUEST_TIMEOUT
+        assert tracker.timeout("other") == MIN_REQUEST_TIMEOUT
+        tracker.record_timeout(2 * MIN_REQUEST_TIMEOUT, "slow")
+        assert tracker.timeout("slow") == 4 * MIN_REQUEST_TIMEOUT
+        tracker.record(7.0, "slow")
+        assert tracker.timeout("slow") == MIN_REQUEST_TIMEOUT
+
+
+# -- HedgeBudget ------------------------------------------------------------
+
+class TestHedgeBudget:
+    def test_caps_hedge_rate(self):
+        budget = HedgeBudget(ratio=0.1)
+        spent = 0
+        for _ in range(50):
+            budget.count_request()
+            spent += budget.try_spend()
+        assert spent == 5
+
+
+# -- hedged_request ---------------------------------------------------------
+
+class TestHedgedRequest:
+    def _budget(self):
+        budget = HedgeBudget(ratio=1.0)
+        budget.requests = 10
+        return budget
+
+    def test_no_delay_sends_once(self):
+        first = _FakeResponse("first")
+        send = _sender((0, first))
+        assert hedged_request(send, delay=None, budget=self._budget()) is first
+
+    def test_fast_response_not_hedged(self):
+        budget = self._budget()
+        send = _sender((0, _FakeResponse("first")))
+        assert hedged_request(send, delay=0.5, budget=budget).name == "first"
+        assert budget.hedges == 0
+
+    def test_slow_first_loses_and_is_closed(self):
+        first, second = _FakeResponse("first"), _FakeResponse("second")
+        send = _sender((0.3, first), (0, second))
+        assert hedged_request(send, delay=0.05, budget=self._budget()) is second
+        time.sleep(0.4)
+        assert first.closed
+
+    def test_failed_winner_falls_back_to_other(self):
+        first = _FakeResponse("first")
+        send = _sender((0.2, first), (0, requests.ConnectionError("boom")))
+        assert hedged_request(send, delay=0.05, budget=self._budget()) is first
+
+    def test_both_fail_raises(self):
+        send = _sender(
+            (0.1, requests.Timeout("slow")), (0, requests.ConnectionError("x")),
+        )
+        with pytest.raises(requests.RequestException):
+            hedged_request(send, delay=0.05, budget=self._budget())
+
+    def test_exhausted_budget_waits_for_first(self):
+        budget = HedgeBudget(ratio=0.0)
+        send = _sender((0.1, _FakeResponse("first")))
+        assert hedged_request(send, delay=0.01, budget=budget).name == "first"
+        assert budget.hedges == 0
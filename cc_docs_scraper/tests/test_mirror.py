@@ -0,0 +1,144 @@
+"""Tests for cc_docs_scraper.mirror."""
+
+import asyncio
+import json
+
+import pytest
+
+from cc_docs_scraper import orchestrator
+from cc_docs_scraper.cassette import Cassette, replay_session
+from cc_docs_scraper.constants import INDEX_URL
+from cc_docs_scraper.mirror import (
+    Mirror,
+    MirrorError,
+    PageResult,
+    ThresholdError,
+)
+
+URL_A = "https://code.claude.com/docs/en/page-a.md"
+URL_B = "https://code.claude.com/docs/en/page-b.md"
+PAGE = "# Title\n\nThis is a paragraph with enough content to pass the minimum length validation check."
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+def _exchange(url, status=200, body="", headers=None):
+    return {
+        "method": "GET",
+        "url": url,
+        "status": status,
+        "headers": headers or {},
+        "body": body,
+        "body_encoding": "utf-8",
+        "elapsed": 0.0,
+    }
+
+
+def _mirror(output_dir, *exchanges):
+    index = f"- [A]({URL_A})\n- [B]({URL_B})\n"
+    cassette = Cassette([
+        _exchange(INDEX_URL, body=index, headers={"Last-Modified": LAST_MODIFIED}),
+        *exchanges,
+    ])
+    return Mirror(
+        output_dir, session=replay_session(cassette), rate_limit=False,
+    )
+
+
+SITE = (
+    _exchange(URL_A, body=PAGE, headers={"Last-Modified": LAST_MODIFIED}),
+    _exchange(URL_B, body=PAGE.replace("Title", "Other")),
+)
+
+
+# -- Mirror -----------------------------------------------------------------
+
+class TestMirror:
+    def test_iter_refresh_yields_typed_results(self, output_dir):
+        with _mirror(output_dir, *SITE) as mirror:
+            pages = list(mirror.iter_refresh())
+
+        assert [p.status for p in pages] == ["new", "new"]
+        first = pages[0]
+        assert isinstance(first, PageResult)
+        assert first.url == URL_A
+        assert first.path == output_dir / "page-a.md"
+        assert first.bytes == len(PAGE)
+        assert first.latency >= 0
+        assert first.path.read_text() == PAGE
+        assert mirror.stats["new"] == 2
+
+        manifest = json.loads((output_dir / "manifest.json").read_text())
+        assert len(manifest["files"]) == 2
+
+    def test_stop_early_commits_processed_pages(self, output_dir):
+        mirror = _mirror(output_dir, *SITE)
+        pages = mirror.iter_refresh()
+        assert next(pages).status == "new"
+        pages.close()
+
+        manifest = json.loads((output_dir / "manifest.json").read_text())
+        assert list(manifest["files"]) == [str(output_dir / "page-a.md")]
+        assert mirror.stats["new"] == 1
+
+    def test_reused_across_refreshes(self, output_dir):
+        mirror = _mirror(
+            output_dir, *SITE,
+            _exchange(INDEX_URL, status=304),
+            _exchange(URL_A, status=304),
+            _exchange(URL_B, status=304),
+        )
+        mirror.refresh()
+        stats = mirror.refresh()
+        assert stats["not_modified"] == 2
+        assert stats["new"] == 0
+
+    def test_empty_index_raises(self, output_dir):
+        cassette = Cassette([_exchange(INDEX_URL, body="nothing here")])
+        mirror = Mirror(output_dir, session=replay_session(cassette))
+        with pytest.raises(MirrorError):
+            mirror.refresh()
+
+    def test_rejected_index_is_not_trusted_as_fresh(self, output_dir):
+        known = {
+            str(output_dir / f"page-{n}.md"): {
+                "url": f"https://code.claude.com/docs/en/page-{n}.md",
+            }
+            for n in "cdef"
+        }
+        manifest_file = output_dir / "manifest.json"
+        manifest_file.write_text(json.dumps({"files": known}))
+        index = _exchange(
+            INDEX_URL, body=f"- [A]({URL_A})\n",
+            headers={"Cache-Control": "max-age=3600"},
+        )
+        mirror = Mirror(
+            output_dir, session=replay_session(Cassette([index, index])),
+        )
+        for _ in range(2):
+            with pytest.raises(ThresholdError):
+                mirror.refresh()
+        assert "index_fresh_until" not in mirror.manifest
+        assert "index_fresh_until" not in json.loads(
+            manifest_file.read_text(),
+        )
+
+    def test_mostly_failed_refresh_raises(self, output_dir, monkeypatch):
+        monkeypatch.setattr(orchestrator, "retry_delay", lambda attempt: 0)
+        mirror = _mirror(
+            output_dir, *SITE,
+            _exchange(INDEX_URL, status=304),
+            _exchange(INDEX_URL, status=304),
+        )
+        mirror.refresh()
+        with pytest.raises(ThresholdError, match="post-fetch"):
+            mirror.refresh()  # no responses left for the pages
+        assert mirror.stats["failed"] == 2
+        assert mirror.refresh(force=True)["failed"] == 2
+
+    def test_async_iterator(self, output_dir):
+        async def collect():
+            with _mirror(output_dir, *SITE) as mirror:
+                return [page async for page in mirror.aiter_refresh()]
+
+        pages = asyncio.run(collect())
+        assert [p.url for p in pages] == [URL_A, URL_B]
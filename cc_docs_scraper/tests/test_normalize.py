@@ -0,0 +1,88 @@
+"""Tests for cc_docs_scraper.normalize."""
+
+import pytest
+
+from cc_docs_scraper.normalize import (
+    DEFAULT_NORMALIZERS,
+    normalize,
+    parse_normalizers,
+    semantic_hash,
+)
+
+PAGE = "# Setup\n\nInstall it.\n"
+
+
+class TestNormalizers:
+    def test_build_id(self):
+        a = normalize("Build ID: 8f3a2b1c9d\n", ["build-id"])
+        b = normalize("Build ID: 0c1d2e3f4a\n", ["build-id"])
+        assert a == b == "Build ID: <build-id>\n"
+
+    def test_build_prose_untouched(self):
+        text = "The build step runs node 18.\n"
+        assert normalize(text, ["build-id"]) == text
+        text = "Run build pipeline-v2-release first.\n"
+        assert normalize(text, ["build-id"]) == text
+
+    def test_timestamps(self):
+        text = "Generated 2025-01-02T03:04:05Z on 2025-01-02\n"
+        assert normalize(text, ["timestamps"]) == (
+            "Generated <timestamp> on 2025-01-02\n"
+        )
+
+    def test_tracking_params(self):
+        text = "[x](https://example.com/a?utm_source=n&id=2&gclid=9)"
+        assert normalize(text, ["tracking-params"]) == (
+            "[x](https://example.com/a?id=2)"
+        )
+
+    def test_whitespace(self):
+        text = "# A \r\n\r\n\r\n\r\ntext\t\n\n"
+        assert normalize(text, ["whitespace"]) == "# A\n\ntext\n"
+
+    def test_whitespace_keeps_hard_breaks(self):
+        assert normalize("one   \ntwo\n", ["whitespace"]) == "one  \ntwo\n"
+        assert normalize("one\ntwo\n", ["whitespace"]) == "one\ntwo\n"
+
+    def test_code_blocks_untouched(self):
+        text = (
+            "Intro\n\n\n```json\n"
+            '{"at": "2025-01-02T03:04:05Z"}  \n\n\n\n}\n'
+            "```\n"
+        )
+        assert normalize(text, ["timestamps", "whitespace"]) == (
+            "Intro\n\n```json\n"
+            '{"at": "2025-01-02T03:04:05Z"}  \n\n\n\n}\n'
+            "```\n"
+        )
+
+
+class TestParseNormalizers:
+    def test_list(self):
+        assert parse_normalizers("timestamps, whitespace") == (
+            "timestamps", "whitespace",
+        )
+
+    def test_none(self):
+        assert parse_normalizers("none") == ()
+
+    def test_unknown(self):
+        with pytest.raises(ValueError, match="bogus"):
+            parse_normalizers("whitespace,bogus")
+
+
+class TestSemanticHash:
+    def test_ignores_volatile_content(self):
+        names = ("timestamps", "whitespace")
+        a = PAGE + "Built 2025-01-01T00:00:00Z\n"
+        b = PAGE + "Built 2025-06-30T12:00:00Z \n\n"
+        assert semantic_hash(a, names) == semantic_hash(b, names)
+        assert semantic_hash(a, ()) != semantic_hash(b, ())
+
+    def test_opt_in_by_default(self):
+        assert DEFAULT_NORMALIZERS == ()
+        a = PAGE + "Built 2025-01-01T00:00:00Z\n"
+        assert semantic_hash(a) != semantic_hash(a.replace("01T", "02T"))
+
+    def test_real_change_detected(self):
+        assert semantic_hash(PAGE) != semantic_hash(PAGE + "More.\n")
@@ -2,7 +2,14 @@
 
 import pytest
 
-from cc_docs_scraper.orchestrator import remove_stale_files, run_fetch
+from cc_docs_scraper import orchestrator
+from cc_docs_scraper.constants import MAX_RETRIES
+from cc_docs_scraper.http import FetchResult
+from cc_docs_scraper.orchestrator import (
+    iter_fetch,
+    remove_stale_files,
+    run_fetch,
+)
 
 URL_A = "https://code.claude.com/docs/en/page-a.md"
 URL_B = "https://code.claude.com/docs/en/page-b.md"
@@ -169,6 +176,400 @@ class TestRunFetch:
         )
         assert not manifest_file.exists()
 
+    def test_fresh_page_skipped_without_request(self, output_dir):
+        calls = []
+
+        def tracking_fetch(url, if_modified_since=None):
+            calls.append(url)
+            return VALID_CONTENT, LAST_MODIFIED, False
+
+        filepath = output_dir / "page-a.md"
+        manifest = {
+            "files": {
+                str(filepath): {
+                    "url": URL_A,
+                    "sha256": "oldhash",
+                    "fresh_until": "2999-01-01T00:00:00Z",
+                }
+            }
+        }
+        stats = run_fetch(
+            [URL_A], manifest,
+            fetch_fn=tracking_fetch,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert stats["fresh"] == 1
+        assert calls == []
+
+    def test_expired_freshness_revalidates(self, output_dir):
+        filepath = output_dir / "page-a.md"
+        manifest = {
+            "files": {
+                str(filepath): {
+                    "url": URL_A,
+                    "sha256": "oldhash",
+                    "fresh_until": "2000-01-01T00:00:00Z",
+                }
+            }
+        }
+        stats = run_fetch(
+            [URL_A], manifest,
+            fetch_fn=_fake_fetch(),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert stats["fresh"] == 0
+        assert stats["updated"] == 1
+
+    def test_force_bypasses_freshness(self, output_dir):
+        filepath = output_dir / "page-a.md"
+        manifest = {
+            "files": {
+                str(filepath): {
+                    "url": URL_A,
+                    "sha256": "oldhash",
+                    "fresh_until": "2999-01-01T00:00:00Z",
+                }
+            }
+        }
+        stats = run_fetch(
+            [URL_A], manifest,
+            force=True,
+            fetch_fn=_fake_fetch(),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert stats["fresh"] == 0
+        assert stats["updated"] == 1
+
+    def test_fresh_until_recorded(self, output_dir):
+        def fetch_fn(url, if_modified_since=None):
+            return FetchResult(
+                VALID_CONTENT, LAST_MODIFIED, False, "2999-01-01T00:00:00Z",
+            )
+
+        manifest = {"files": {}}
+        run_fetch(
+            [URL_A], manifest,
+            fetch_fn=fetch_fn,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        entry = manifest["files"][str(output_dir / "page-a.md")]
+        assert entry["fresh_until"] == "2999-01-01T00:00:00Z"
+
+    def test_304_refreshes_fresh_until(self, output_dir):
+        def fetch_fn(url, if_modified_since=None):
+            return FetchResult(None, None, True, "2999-01-01T00:00:00Z")
+
+        filepath = output_dir / "page-a.md"
+        manifest = {"files": {str(filepath): {"url": URL_A, "sha256": "h"}}}
+        run_fetch(
+            [URL_A], manifest,
+            fetch_fn=fetch_fn,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert manifest["files"][str(filepath)]["fresh_until"] == (
+            "2999-01-01T00:00:00Z"
+        )
+
+    def test_probe_changed_reported_in_verify_mode(self, output_dir):
+        def fetch_fn(url, if_modified_since=None):
+            return FetchResult(None, None, False, changed=True)
+
+        filepath = output_dir / "page-a.md"
+        manifest = {"files": {str(filepath): {"url": URL_A, "sha256": "h"}}}
+        stats = run_fetch(
+            [URL_A], manifest,
+            verify_only=True,
+            fetch_fn=fetch_fn,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert stats["updated"] == 1
+        assert stats["failed"] == 0
+
+    def test_etag_and_size_recorded(self, output_dir):
+        def fetch_fn(url, if_modified_since=None):
+            return FetchResult(VALID_CONTENT, LAST_MODIFIED, False, etag='"v1"')
+
+        manifest = {"files": {}}
+        run_fetch(
+            [URL_A], manifest,
+            fetch_fn=fetch_fn,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        entry = manifest["files"][str(output_dir / "page-a.md")]
+        assert entry["etag"] == '"v1"'
+        assert entry["size"] == len(VALID_CONTENT.encode("utf-8"))
+
+    def test_change_report_written(self, output_dir):
+        import json
+
+        filepath = output_dir / "page-a.md"
+        filepath.write_text(VALID_CONTENT, "utf-8")
+        manifest = {"files": {str(filepath): {"url": URL_A, "sha256": "old"}}}
+        report_dir = output_dir / ".reports"
+        run_fetch(
+            [URL_A], manifest,
+            verify_only=True,
+            fetch_fn=_fake_fetch(content=UPDATED_CONTENT),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            report_dir=report_dir,
+        )
+        report = json.loads((report_dir / "changes.json").read_text())
+        assert report["verify_only"] is True
+        [page] = report["pages"]
+        assert page["status"] == "updated"
+        assert page["sections"]["added"] == ["Updated Title"]
+        assert page["sections"]["removed"] == ["Title"]
+        assert (report_dir / "changes.md").exists()
+
+    def test_no_report_by_default(self, output_dir):
+        run_fetch(
+            [URL_A], {"files": {}},
+            fetch_fn=_fake_fetch(),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert not (output_dir / ".reports").exists()
+
+    def test_failed_write_keeps_previous_entry(self, output_dir):
+        filepath = output_dir / "page-a.md"
+        filepath.mkdir()  # write will fail: path is a directory
+        previous = {"url": URL_A, "sha256": "oldhash"}
+        manifest = {"files": {str(filepath): dict(previous)}}
+
+        stats = run_fetch(
+            [URL_A], manifest,
+            fetch_fn=_fake_fetch(),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert stats["failed"] == 1
+        assert stats["updated"] == 0
+        assert manifest["files"][str(filepath)] == previous
+
+    def test_failed_write_of_new_page_dropped(self, output_dir):
+        (output_dir / "page-a.md").mkdir()
+        manifest = {"files": {}}
+        stats = run_fetch(
+            [URL_A], manifest,
+            fetch_fn=_fake_fetch(),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert stats["failed"] == 1
+        assert stats["new"] == 0
+        assert manifest["files"] == {}
+
+    def test_volatile_only_change_not_written(self, output_dir):
+        stamped = VALID_CONTENT + "\n\nGenerated 2025-01-01T00:00:00Z\n"
+        restamped = stamped.replace("00Z", "00.5Z")
+        report_dir = output_dir / ".reports"
+        kwargs = dict(
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            report_dir=report_dir,
+            rate_limit=False,
+        )
+        manifest = {"files": {}}
+        run_fetch(
+            [URL_A], manifest, fetch_fn=_fake_fetch(stamped),
+            normalizers=("timestamps",), **kwargs,
+        )
+        entry = dict(manifest["files"][str(output_dir / "page-a.md")])
+
+        stats = run_fetch(
+            [URL_A], manifest, fetch_fn=_fake_fetch(restamped),
+            normalizers=("timestamps",), **kwargs,
+        )
+        assert stats["unchanged"] == 1
+        assert stats["updated"] == 0
+        assert (output_dir / "page-a.md").read_text() == stamped
+        kept = manifest["files"][str(output_dir / "page-a.md")]
+        assert kept["size"] == len(restamped)  # as served, for HEAD probes
+        assert {**kept, "size": entry["size"]} == entry
+
+        stats = run_fetch(
+            [URL_A], manifest, fetch_fn=_fake_fetch(restamped), **kwargs,
+        )
+        assert stats["updated"] == 1
+
+    def test_update_keeps_sitemap_lastmod(self, output_dir):
+        key = str(output_dir / "page-a.md")
+        manifest = {"files": {key: {
+            "url": URL_A, "sha256": "old", "sitemap_lastmod": "2025-01-05",
+        }}}
+        run_fetch(
+            [URL_A], manifest,
+            fetch_fn=_fake_fetch(),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        )
+        assert manifest["files"][key]["sitemap_lastmod"] == "2025-01-05"
+        assert manifest["files"][key]["sha256"] != "old"
+
+    def test_iter_fetch_reports_failed_write(self, output_dir):
+        (output_dir / "page-a.md").mkdir()
+        results = list(iter_fetch(
+            [URL_A], {"files": {}},
+            fetch_fn=_fake_fetch(),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+        ))
+        assert [r.status for r in results] == ["new", "failed"]
+        assert results[0].sha256 is not None
+        assert results[1].url == URL_A
+
+    def test_wire_and_decoded_bytes_totalled(self, output_dir):
+        def fetch_fn(url, if_modified_since=None):
+            if url == URL_B:
+                return FetchResult(None, None, True, wire_bytes=0)
+            return FetchResult(
+                VALID_CONTENT, LAST_MODIFIED, False,
+                wire_bytes=40, decoded_bytes=len(VALID_CONTENT),
+            )
+
+        stats = orchestrator.new_stats()
+        results = list(iter_fetch(
+            [URL_A, URL_B], {"files": {}},
+            fetch_fn=fetch_fn,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            rate_limit=False,
+            stats=stats,
+        ))
+        assert [r.wire_bytes for r in results] == [40, 0]
+        assert results[0].bytes == len(VALID_CONTENT)
+        assert stats["wire_bytes"] == 40
+        assert stats["decoded_bytes"] == len(VALID_CONTENT)
+
+    def test_prefetch_hook_gets_conditional_requests(self, output_dir):
+        class Prefetching:
+            def __init__(self):
+                self.prefetched = None
+
+            def prefetch(self, pages):
+                self.prefetched = pages
+
+            def __call__(self, url, if_modified_since=None):
+                return VALID_CONTENT, LAST_MODIFIED, False
+
+        manifest = {"files": {
+            str(output_dir / "page-a.md"): {
+                "url": URL_A, "last_modified": LAST_MODIFIED,
+            },
+            str(output_dir / "page-b.md"): {
+                "url": URL_B, "fresh_until": "2999-01-01T00:00:00Z",
+            },
+        }}
+        fetch_fn = Prefetching()
+        run_fetch(
+            [URL_A, URL_B], manifest,
+            fetch_fn=fetch_fn,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            rate_limit=False,
+        )
+        assert fetch_fn.prefetched == [(URL_A, LAST_MODIFIED)]
+
+    def test_size_is_served_body_length(self, output_dir):
+        # A latin-1 decoded body re-encodes to more UTF-8 bytes
+        content = VALID_CONTENT + " caf\u00e9"
+        manifest = {"files": {}}
+        run_fetch(
+            [URL_A], manifest,
+            fetch_fn=lambda url, ims=None: FetchResult(
+                content, LAST_MODIFIED, False, decoded_bytes=len(content),
+            ),
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            rate_limit=False,
+        )
+        entry = manifest["files"][str(output_dir / "page-a.md")]
+        assert entry["size"] == len(content)
+
+    def test_chunk_changes_written(self, output_dir):
+        import json
+
+        report_dir = output_dir / ".reports"
+        kwargs = dict(
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            report_dir=report_dir,
+            chunk_index_file=output_dir / "chunks.json",
+            rate_limit=False,
+        )
+        manifest = {"files": {}}
+        run_fetch([URL_A], manifest, fetch_fn=_fake_fetch(), **kwargs)
+        run_fetch(
+            [URL_A], manifest,
+            fetch_fn=_fake_fetch(content=UPDATED_CONTENT), **kwargs,
+        )
+        delta = json.loads((report_dir / "chunk-changes.json").read_text())
+        assert delta["added"] == ["page-a.md#updated-title"]
+        assert delta["removed"] == ["page-a.md#title"]
+        assert delta["changed"] == []
+
+
+# -- deferred retries -------------------------------------------------------
+
+def _flaky_fetch(failures):
+    """Fetch function failing retryably *failures[url]* times per URL."""
+    calls = []
+
+    def fetch_fn(url, if_modified_since=None):
+        calls.append(url)
+        if failures.get(url, 0) > 0:
+            failures[url] -= 1
+            return FetchResult(None, None, False, retryable=True)
+        return FetchResult(VALID_CONTENT, LAST_MODIFIED, False)
+    fetch_fn.calls = calls
+    return fetch_fn
+
+
+class TestDeferredRetries:
+    @pytest.fixture(autouse=True)
+    def _short_backoff(self, monkeypatch):
+        monkeypatch.setattr(orchestrator, "retry_delay", lambda attempt: 0.05)
+
+    def _run(self, output_dir, urls, fetch_fn):
+        return run_fetch(
+            urls, {"files": {}},
+            fetch_fn=fetch_fn,
+            output_dir=output_dir,
+            manifest_file=output_dir / "manifest.json",
+            rate_limit=False,
+        )
+
+    def test_healthy_urls_not_held_up(self, output_dir):
+        fetch_fn = _flaky_fetch({URL_A: 1})
+        stats = self._run(output_dir, [URL_A, URL_B], fetch_fn)
+        assert fetch_fn.calls == [URL_A, URL_B, URL_A]
+        assert stats["new"] == 2
+        assert stats["failed"] == 0
+
+    def test_gives_up_after_max_retries(self, output_dir):
+        fetch_fn = _flaky_fetch({URL_A: 99})
+        stats = self._run(output_dir, [URL_A], fetch_fn)
+        assert fetch_fn.calls == [URL_A] * MAX_RETRIES
+        assert stats["failed"] == 1
+
+    def test_invalid_content_not_retried(self, output_dir):
+        calls = []
+
+        def fetch_fn(url, if_modified_since=None):
+            calls.append(url)
+            return None, None, False
+        stats = self._run(output_dir, [URL_A], fetch_fn)
+        assert calls == [URL_A]
+        assert stats["failed"] == 1
+
 
 # -- remove_stale_files -----------------------------------------------------
 
@@ -0,0 +1,124 @@
+"""Tests for cc_docs_scraper.reader."""
+
+import os
+
+import pytest
+
+from cc_docs_scraper.content import compute_hash
+from cc_docs_scraper.manifest import save_manifest
+from cc_docs_scraper.reader import MirrorReader, page_slug
+
+URL_A = "https://code.claude.com/docs/en/page-a.md"
+URL_B = "https://code.claude.com/docs/en/sub/page-b.md"
+
+
+def _write_mirror(output_dir, pages):
+    """Write *pages* ({url: content}) and a matching manifest."""
+    files = {}
+    for url, content in pages.items():
+        path = output_dir / page_slug(url)
+        path = path.with_name(path.name + ".md")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, "utf-8")
+        files[str(path)] = {"url": url, "sha256": compute_hash(content)}
+    manifest_file = output_dir / "manifest.json"
+    save_manifest({"files": files}, manifest_file=manifest_file, output_dir=output_dir)
+    # Make sure the reader sees a new mtime even on coarse filesystems
+    st = os.stat(manifest_file)
+    os.utime(manifest_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+# -- MirrorReader -----------------------------------------------------------
+
+class TestMirrorReader:
+    def test_lookup_by_slug_name_and_url(self, output_dir):
+        _write_mirror(output_dir, {URL_A: "# A\n", URL_B: "# B\n"})
+        reader = MirrorReader(output_dir)
+        assert len(reader) == 2
+        assert reader.read("page-a") == b"# A\n"
+        assert reader.read("page-a.md") == b"# A\n"
+        assert reader.read(URL_A) == b"# A\n"
+        assert reader.read("sub/page-b") == b"# B\n"
+        assert reader.read_text(
+            "https://docs.anthropic.com/en/docs/claude-code/page-a"
+        ) == "# A\n"
+
+    def test_relative_keys_from_other_cwd(self, tmp_path, monkeypatch):
+        output_dir = tmp_path / "project" / "docs"
+        (output_dir / "sub").mkdir(parents=True)
+        (output_dir / "page-a.md").write_text("# A\n")
+        (output_dir / "sub" / "page-b.md").write_text("# B\n")
+        files = {
+            "docs/page-a.md": {"url": URL_A},
+            "docs/sub/page-b.md": {},  # no URL: resolved from the key
+        }
+        save_manifest(
+            {"files": files},
+            manifest_file=output_dir / "manifest.json",
+            output_dir=output_dir,
+        )
+        monkeypatch.chdir(tmp_path)
+
+        reader = MirrorReader(output_dir.resolve())
+        assert reader.read("page-a") == b"# A\n"
+        assert reader.read("docs/sub/page-b.md") == b"# B\n"
+
+    def test_same_file_name_in_two_dirs(self, output_dir):
+        url_c = "https://code.claude.com/docs/en/other/page-b.md"
+        _write_mirror(output_dir, {URL_B: "# B\n", url_c: "# C\n"})
+        reader = MirrorReader(output_dir)
+        assert reader.read("sub/page-b.md") == b"# B\n"
+        assert reader.read("other/page-b.md") == b"# C\n"
+        assert "page-b.md" not in reader
+
+    def test_unknown_page_raises(self, output_dir):
+        _write_mirror(output_dir, {URL_A: "# A\n"})
+        reader = MirrorReader(output_dir)
+        assert "missing" not in reader
+        with pytest.raises(KeyError):
+            reader.read("missing")
+
+    def test_empty_file(self, output_dir):
+        _write_mirror(output_dir, {URL_A: ""})
+        assert MirrorReader(output_dir).read("page-a") == b""
+
+    def test_repeat_reads_are_cached(self, output_dir):
+        _write_mirror(output_dir, {URL_A: "# A\n"})
+        reader = MirrorReader(output_dir)
+        reader.read("page-a")
+        (output_dir / "page-a.md").unlink()
+        assert reader.read("page-a") == b"# A\n"
+
+    def test_lru_bounded_by_size(self, output_dir):
+        _write_mirror(output_dir, {URL_A: "a" * 60, URL_B: "b" * 60})
+        reader = MirrorReader(output_dir, cache_bytes=100)
+        reader.read("page-a")
+        reader.read("sub/page-b")
+        assert list(reader._cache) == [output_dir / "sub" / "page-b.md"]
+        assert reader._cached_bytes == 60
+
+    def test_oversized_page_not_cached(self, output_dir):
+        _write_mirror(output_dir, {URL_A: "a" * 200})
+        reader = MirrorReader(output_dir, cache_bytes=100)
+        assert reader.read("page-a") == b"a" * 200
+        assert not reader._cache
+
+    def test_refresh_evicts_only_changed_pages(self, output_dir):
+        _write_mirror(output_dir, {URL_A: "# A\n", URL_B: "# B\n"})
+        reader = MirrorReader(output_dir)
+        reader.read("page-a")
+        reader.read("sub/page-b")
+
+        assert reader.refresh() == 0  # manifest untouched
+        _write_mirror(output_dir, {URL_A: "# A v2\n", URL_B: "# B\n"})
+        assert reader.refresh() == 1
+        assert reader.read("page-a") == b"# A v2\n"
+        assert output_dir / "sub" / "page-b.md" in reader._cache
+
+    def test_refresh_drops_removed_pages(self, output_dir):
+        _write_mirror(output_dir, {URL_A: "# A\n", URL_B: "# B\n"})
+        reader = MirrorReader(output_dir)
+        reader.read("sub/page-b")
+        _write_mirror(output_dir, {URL_A: "# A\n"})
+        assert reader.refresh() == 1
+        assert "sub/page-b" not in reader
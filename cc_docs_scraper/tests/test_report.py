@@ -0,0 +1,57 @@
+"""Tests for cc_docs_scraper.report."""
+
+import json
+
+from cc_docs_scraper.diff import page_change_report
+from cc_docs_scraper.report import render_markdown, write_change_report
+
+URL = "https://code.claude.com/docs/en/example.md"
+STATS = {"new": 0, "updated": 1, "failed": 0}
+
+
+def _page(old="# A\n\none\n", new="# A\n\ntwo\n"):
+    return {
+        "url": URL,
+        "path": "docs/example.md",
+        "status": "updated",
+        **page_change_report(old, new),
+    }
+
+
+class TestWriteChangeReport:
+    def test_writes_json_and_markdown(self, tmp_path):
+        json_file = write_change_report([_page()], STATS, report_dir=tmp_path)
+        report = json.loads(json_file.read_text())
+        assert report["stats"] == STATS
+        assert report["pages"][0]["lines_added"] == 1
+        assert (tmp_path / "changes.md").exists()
+
+    def test_markdown_lists_sections_and_hunks(self):
+        md = render_markdown({
+            "generated": "2025-01-01T00:00:00Z",
+            "verify_only": True,
+            "stats": STATS,
+            "pages": [_page()],
+        })
+        assert "# Change report (verify)" in md
+        assert "- Sections modified: `A`" in md
+        assert "-one\n+two" in md
+
+    def test_markdown_without_body(self):
+        page = {"url": URL, "path": "docs/example.md", "status": "updated"}
+        md = render_markdown({
+            "generated": "2025-01-01T00:00:00Z",
+            "verify_only": True,
+            "stats": STATS,
+            "pages": [page],
+        })
+        assert "body not downloaded" in md
+
+    def test_empty_run(self):
+        md = render_markdown({
+            "generated": "2025-01-01T00:00:00Z",
+            "verify_only": False,
+            "stats": STATS,
+            "pages": [],
+        })
+        assert "No pages changed." in md
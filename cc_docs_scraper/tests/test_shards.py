@@ -0,0 +1,186 @@
+"""Tests for cc_docs_scraper.shards."""
+
+import json
+
+import pytest
+
+from cc_docs_scraper.manifest import load_manifest, save_manifest
+from cc_docs_scraper.shards import (
+    filter_shard_urls,
+    fragment_path,
+    manifest_owns,
+    merge_fragments,
+    parse_shard,
+    shard_for_url,
+    shard_manifest,
+)
+
+URLS = [f"https://code.claude.com/docs/en/page{i}.md" for i in range(20)]
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+def _entry(url: str) -> dict:
+    return {"url": url, "sha256": "abc", "last_modified": LAST_MODIFIED}
+
+
+def _write_fragments(output_dir, shard_count):
+    """Write one fragment per shard covering *urls*."""
+    for shard in range(1, shard_count + 1):
+        fragment = {
+            "files": {
+                f"docs/{url.rsplit('/', 1)[1]}": _entry(url)
+                for url in filter_shard_urls(URLS, shard, shard_count)
+            },
+            "index_last_modified": LAST_MODIFIED,
+            "shard": shard,
+            "shard_count": shard_count,
+        }
+        save_manifest(
+            fragment,
+            manifest_file=fragment_path(shard, shard_count, output_dir),
+            output_dir=output_dir,
+        )
+
+
+# -- parse_shard -----------------------------------------------------------
+
+class TestParseShard:
+    def test_parses_spec(self):
+        assert parse_shard("2/4") == (2, 4)
+
+    def test_single_shard(self):
+        assert parse_shard("1/1") == (1, 1)
+
+    @pytest.mark.parametrize("spec", ["0/4", "5/4", "1/0", "a/b", "1", "1/2/3"])
+    def test_rejects_invalid(self, spec):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+# -- shard_for_url / filter_shard_urls -------------------------------------
+
+class TestShardAssignment:
+    def test_in_range(self):
+        assert all(1 <= shard_for_url(url, 3) <= 3 for url in URLS)
+
+    def test_stable(self):
+        # Pinned value: must not change across processes or releases
+        assert [shard_for_url(url, 4) for url in URLS[:3]] == [3, 4, 1]
+
+    def test_partition_covers_every_url_once(self):
+        parts = [filter_shard_urls(URLS, s, 3) for s in (1, 2, 3)]
+        assert sorted(url for part in parts for url in part) == sorted(URLS)
+
+    def test_shard_manifest_keeps_owned_entries(self):
+        manifest = {
+            "files": {f"docs/page{i}.md": _entry(url) for i, url in enumerate(URLS)},
+            "index_last_modified": LAST_MODIFIED,
+        }
+        local = shard_manifest(manifest, 2, 3)
+        assert local["shard"] == 2
+        assert local["shard_count"] == 3
+        assert local["index_last_modified"] == LAST_MODIFIED
+        assert {m["url"] for m in local["files"].values()} == set(
+            filter_shard_urls(URLS, 2, 3)
+        )
+
+    def test_manifest_owns(self):
+        local = {"files": {}, "shard": 3, "shard_count": 4}
+        assert manifest_owns(local, URLS[0])
+        assert not manifest_owns(local, URLS[1])
+        assert manifest_owns({"files": {}}, URLS[1])
+
+
+# -- merge_fragments -------------------------------------------------------
+
+class TestMergeFragments:
+    def test_merges_all_shards(self, output_dir):
+        manifest_file = output_dir / "manifest.json"
+        _write_fragments(output_dir, 3)
+
+        assert merge_fragments(manifest_file, output_dir) == 3
+
+        merged = load_manifest(manifest_file)
+        assert {m["url"] for m in merged["files"].values()} == set(URLS)
+        assert merged["index_last_modified"] == LAST_MODIFIED
+        assert "shard" not in merged
+        assert not list(output_dir.glob("manifest.shard-*"))
+
+    def test_fragments_replace_previous_entries(self, output_dir):
+        manifest_file = output_dir / "manifest.json"
+        save_manifest(
+            {"files": {"docs/gone.md": _entry("https://code.claude.com/docs/en/gone.md")}},
+            manifest_file=manifest_file,
+            output_dir=output_dir,
+        )
+        _write_fragments(output_dir, 2)
+        merge_fragments(manifest_file, output_dir)
+        assert "docs/gone.md" not in load_manifest(manifest_file)["files"]
+
+    def test_missing_shard_aborts(self, output_dir):
+        manifest_file = output_dir / "manifest.json"
+        _write_fragments(output_dir, 3)
+        fragment_path(2, 3, output_dir).unlink()
+
+        with pytest.raises(ValueError, match="Missing"):
+            merge_fragments(manifest_file, output_dir)
+        assert not manifest_file.exists()
+        assert len(list(output_dir.glob("manifest.shard-*"))) == 2
+
+    def test_mixed_shard_counts_abort(self, output_dir):
+        _write_fragments(output_dir, 2)
+        _write_fragments(output_dir, 3)
+        with pytest.raises(ValueError, match="shard count"):
+            merge_fragments(output_dir / "manifest.json", output_dir)
+
+    def test_entry_in_wrong_shard_aborts(self, output_dir):
+        _write_fragments(output_dir, 2)
+        path = fragment_path(1, 2, output_dir)
+        fragment = json.loads(path.read_text())
+        stray = filter_shard_urls(URLS, 2, 2)[0]
+        fragment["files"]["docs/stray.md"] = _entry(stray)
+        path.write_text(json.dumps(fragment))
+
+        with pytest.raises(ValueError, match="Conflict"):
+            merge_fragments(output_dir / "manifest.json", output_dir)
+
+    def test_same_file_from_two_shards_aborts(self, output_dir):
+        _write_fragments(output_dir, 2)
+        for shard in (1, 2):
+            path = fragment_path(shard, 2, output_dir)
+            fragment = json.loads(path.read_text())
+            url = filter_shard_urls(URLS, shard, 2)[0]
+            fragment["files"]["docs/clash.md"] = _entry(url)
+            path.write_text(json.dumps(fragment))
+
+        with pytest.raises(ValueError, match="Conflict"):
+            merge_fragments(output_dir / "manifest.json", output_dir)
+
+    def test_index_disagreement_clears_field(self, output_dir):
+        manifest_file = output_dir / "manifest.json"
+        _write_fragments(output_dir, 2)
+        path = fragment_path(2, 2, output_dir)
+        fragment = json.loads(path.read_text())
+        fragment["index_last_modified"] = "Thu, 02 Jan 2025 00:00:00 GMT"
+        path.write_text(json.dumps(fragment))
+
+        merge_fragments(manifest_file, output_dir)
+        assert load_manifest(manifest_file)["index_last_modified"] is None
+
+    def test_no_fragments_aborts(self, output_dir):
+        with pytest.raises(ValueError, match="No shard fragments"):
+            merge_fragments(output_dir / "manifest.json", output_dir)
+
+    def test_index_freshness_takes_earliest(self, output_dir):
+        manifest_file = output_dir / "manifest.json"
+        _write_fragments(output_dir, 2)
+        for shard, deadline in ((1, "2025-01-01T02:00:00Z"), (2, "2025-01-01T01:00:00Z")):
+            path = fragment_path(shard, 2, output_dir)
+            fragment = json.loads(path.read_text())
+            fragment["index_fresh_until"] = deadline
+            path.write_text(json.dumps(fragment))
+
+        merge_fragments(manifest_file, output_dir)
+        merged = load_manifest(manifest_file)
+        assert merged["index_fresh_until"] == "2025-01-01T01:00:00Z"
+        assert merged["index_last_modified"] == LAST_MODIFIED
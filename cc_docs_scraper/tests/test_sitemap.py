@@ -0,0 +1,164 @@
+"""Tests for cc_docs_scraper.sitemap."""
+
+import calendar
+import io
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+import requests
+
+from cc_docs_scraper import sitemap
+from cc_docs_scraper.cassette import Cassette, replay_session
+from cc_docs_scraper.constants import (
+    FULL_SWEEP_INTERVAL,
+    SITEMAP_URL,
+    TIMESTAMP_FORMAT,
+)
+from cc_docs_scraper.sitemap import (
+    full_sweep_due,
+    may_have_changed,
+    parse_sitemap,
+    sitemap_candidates,
+)
+
+URL_A = "https://code.claude.com/docs/en/page-a.md"
+URL_B = "https://code.claude.com/docs/en/page-b.md"
+URL_C = "https://code.claude.com/docs/en/page-c.md"
+LAST_MODIFIED = "Wed, 01 Jan 2025 12:00:00 GMT"
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://code.claude.com/docs/en/page-a</loc>
+       <lastmod>2024-12-31T00:00:00Z</lastmod></url>
+  <url><loc>https://code.claude.com/docs/en/page-b</loc>
+       <lastmod>2025-01-05</lastmod></url>
+  <url><loc>https://code.claude.com/docs/en/page-c</loc></url>
+</urlset>
+"""
+
+
+def _now():
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime())
+
+
+def _manifest(**top):
+    return {
+        "files": {
+            f"docs/{url.rsplit('/', 1)[1]}": {
+                "url": url, "sha256": "abc", "last_modified": LAST_MODIFIED,
+            }
+            for url in (URL_A, URL_B, URL_C)
+        },
+        **top,
+    }
+
+
+# -- parsing / dates --------------------------------------------------------
+
+class TestParseSitemap:
+    def test_entries(self):
+        assert parse_sitemap(io.BytesIO(SITEMAP)) == {
+            URL_A: "2024-12-31T00:00:00Z",
+            URL_B: "2025-01-05",
+            URL_C: None,
+        }
+
+    def test_chunks_split_mid_element(self):
+        chunks = [SITEMAP[i:i + 7] for i in range(0, len(SITEMAP), 7)]
+        assert parse_sitemap(chunks) == parse_sitemap([SITEMAP])
+
+    def test_truncated_document_raises(self):
+        with pytest.raises(ET.ParseError):
+            parse_sitemap([SITEMAP[:-20]])
+
+    def test_fetch_streams_response(self):
+        cassette = Cassette([{
+            "method": "GET", "url": SITEMAP_URL, "status": 200,
+            "headers": {"Last-Modified": LAST_MODIFIED},
+            "body": SITEMAP.decode(), "body_encoding": "utf-8",
+        }])
+        entries, last_modified = sitemap.fetch_sitemap(
+            session=replay_session(cassette),
+        )
+        assert entries == parse_sitemap([SITEMAP])
+        assert last_modified == LAST_MODIFIED
+
+
+class TestMayHaveChanged:
+    def test_older_lastmod(self):
+        assert not may_have_changed("2024-12-31T00:00:00Z", LAST_MODIFIED)
+
+    def test_newer_lastmod(self):
+        assert may_have_changed("2025-01-01T13:00:00+00:00", LAST_MODIFIED)
+
+    def test_bare_date_covers_whole_day(self):
+        assert may_have_changed("2025-01-01", LAST_MODIFIED)
+        assert not may_have_changed("2024-12-31", LAST_MODIFIED)
+
+    def test_missing_or_bad_dates(self):
+        assert may_have_changed(None, LAST_MODIFIED)
+        assert may_have_changed("2025-01-01", None)
+        assert may_have_changed("yesterday", LAST_MODIFIED)
+
+
+class TestFullSweepDue:
+    def test_never_swept(self):
+        assert full_sweep_due({})
+
+    def test_interval(self):
+        manifest = {"last_full_sweep": "2025-01-01T00:00:00Z"}
+        start = calendar.timegm((2025, 1, 1, 0, 0, 0))
+        assert not full_sweep_due(manifest, now=start + 60)
+        assert full_sweep_due(manifest, now=start + FULL_SWEEP_INTERVAL)
+
+
+# -- sitemap_candidates -----------------------------------------------------
+
+class TestSitemapCandidates:
+    @pytest.fixture
+    def responses(self, monkeypatch):
+        queue = []
+
+        def fake_fetch(last_modified=None, *, session=None):
+            result = queue.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        monkeypatch.setattr(sitemap, "fetch_sitemap", fake_fetch)
+        return queue
+
+    def test_only_changed_pages(self, responses):
+        responses.append((parse_sitemap(io.BytesIO(SITEMAP)), LAST_MODIFIED))
+        manifest = _manifest(last_full_sweep=_now())
+        urls = [URL_A, URL_B, URL_C, "https://code.claude.com/docs/en/new.md"]
+        assert sitemap_candidates(urls, manifest) == urls[1:]
+        assert manifest["sitemap_last_modified"] == LAST_MODIFIED
+        assert manifest["files"]["docs/page-b.md"]["sitemap_lastmod"] == "2025-01-05"
+
+    def test_304_reuses_stored_lastmods(self, responses):
+        responses.append((parse_sitemap(io.BytesIO(SITEMAP)), LAST_MODIFIED))
+        responses.append((None, LAST_MODIFIED))
+        manifest = _manifest(last_full_sweep=_now())
+        first = sitemap_candidates([URL_A, URL_B, URL_C], manifest)
+        assert sitemap_candidates([URL_A, URL_B, URL_C], manifest) == first
+
+    def test_full_sweep_when_due(self, responses):
+        manifest = _manifest()
+        urls = [URL_A, URL_B, URL_C]
+        assert sitemap_candidates(urls, manifest) == urls
+        assert manifest["last_full_sweep"]
+        assert not responses  # no sitemap request needed
+
+    def test_unavailable_sitemap_checks_all(self, responses):
+        responses.append(requests.ConnectionError("down"))
+        urls = [URL_A, URL_B]
+        assert sitemap_candidates(urls, _manifest(last_full_sweep=_now())) == urls
+
+    def test_verify_does_not_touch_manifest(self, responses):
+        responses.append((parse_sitemap(io.BytesIO(SITEMAP)), LAST_MODIFIED))
+        manifest = _manifest(last_full_sweep=_now())
+        sitemap_candidates([URL_A], manifest, verify_only=True)
+        assert "sitemap_last_modified" not in manifest
+        assert "sitemap_lastmod" not in manifest["files"]["docs/page-a.md"]
@@ -40,3 +40,12 @@ class TestCheckThresholds:
         # 5 failed out of 10 total = exactly 50%, not > 50%, so it passes
         stats = {"new": 0, "updated": 0, "unchanged": 5, "not_modified": 0, "failed": 5}
         assert check_thresholds(stats, _make_manifest(10), index_url_count=10) is True
+
+    def test_fresh_pages_count_as_success(self):
+        stats = {"new": 0, "updated": 0, "unchanged": 0, "not_modified": 0, "fresh": 10, "failed": 0}
+        assert check_thresholds(stats, _make_manifest(10), index_url_count=10) is True
+
+    def test_fresh_pages_offset_failures(self):
+        # 4 failed out of 10 total with 6 fresh = 40%, passes
+        stats = {"new": 0, "updated": 0, "unchanged": 0, "not_modified": 0, "fresh": 6, "failed": 4}
+        assert check_thresholds(stats, _make_manifest(10), index_url_count=10) is True
@@ -0,0 +1,62 @@
+"""Tests for cc_docs_scraper.writer."""
+
+import pytest
+
+from cc_docs_scraper.writer import DiskWriter, atomic_write_text
+
+
+class TestAtomicWriteText:
+    def test_writes_and_replaces(self, tmp_path):
+        path = tmp_path / "file.txt"
+        atomic_write_text(path, "one")
+        atomic_write_text(path, "two")
+        assert path.read_text() == "two"
+        assert list(tmp_path.iterdir()) == [path]  # no temp file left
+
+    def test_creates_parent_dirs(self, tmp_path):
+        path = tmp_path / "a" / "b" / "file.txt"
+        atomic_write_text(path, "x")
+        assert path.read_text() == "x"
+
+
+class TestDiskWriter:
+    def test_writes_all_pages(self, tmp_path):
+        paths = [tmp_path / f"dir{i % 3}" / f"page{i}.md" for i in range(50)]
+        with DiskWriter(batch_size=4, queue_size=2) as writer:
+            for i, path in enumerate(paths):
+                writer.submit(path, f"content {i}")
+        assert [p.read_text() for p in paths] == [f"content {i}" for i in range(50)]
+        assert not list(tmp_path.rglob(".*.tmp"))
+
+    def test_close_reports_failures(self, tmp_path):
+        blocker = tmp_path / "page.md"
+        blocker.mkdir()  # a directory can't be replaced by a file
+        good = tmp_path / "good.md"
+
+        writer = DiskWriter()
+        writer.submit(blocker, "x")
+        writer.submit(good, "y")
+        failed = writer.close()
+
+        assert list(failed) == [blocker]
+        assert good.read_text() == "y"
+        assert not list(tmp_path.glob(".*.tmp"))
+
+    def test_close_is_idempotent(self, tmp_path):
+        writer = DiskWriter()
+        assert writer.close() == {}
+        assert writer.close() == {}
+
+    def test_dead_writer_raises_instead_of_blocking(
+        self, tmp_path, monkeypatch,
+    ):
+        def crash(self, batch):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(DiskWriter, "_write_batch", crash)
+        writer = DiskWriter(queue_size=1)
+        with pytest.raises(RuntimeError, match="boom"):
+            for i in range(10):
+                writer.submit(tmp_path / f"page{i}.md", "x")
+        with pytest.raises(RuntimeError, match="boom"):
+            writer.close()